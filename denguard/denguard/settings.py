@@ -21,6 +21,11 @@ USE_TZ = True
 
 TOMORROW_API_KEY = os.environ.get("TOMORROW_API_KEY", "")
 
+# SVM risk model artifact; loaded once per process by planner.services.model_registry.
+# Bump RISK_MODEL_VERSION to force a reload without touching the file.
+RISK_MODEL_PATH = BASE_DIR / "planner" / "model" / "svm_weather_model.pkl"
+RISK_MODEL_VERSION = os.environ.get("RISK_MODEL_VERSION")
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -96,6 +101,19 @@ DATABASES = {
 }
 
 
+# Shared across worker processes and the prefetch_weather command, which
+# writes precomputed weather/risk snapshots that the views read.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# Pre-rendered heatmap raster tiles (planner.services.heat_tiles)
+HEATMAP_TILE_DIR = BASE_DIR / 'cache' / 'tiles'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -30,5 +30,9 @@ urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
     path('heatmap/', views.heatmap_view, name='heatmap'),
     path('api/heatmap-data/', views.heatmap_data_api, name='heatmap_data_api'),
+    path('tiles/heatmap/<int:z>/<int:x>/<int:y>.png', views.heatmap_tile, name='heatmap_tile'),
+    path('api/risk/batch/', views.risk_batch_api, name='risk_batch_api'),
+    path('api/risk/forecast/', views.risk_forecast_api, name='risk_forecast_api'),
+    path('api/cases/summary/', views.case_windows_api, name='case_windows_api'),
     path("weather/today/", views.weather_today, name="weather_today"),
 ]
@@ -1,6 +1,27 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import DengueStat
+from .models import CaseWindowSummary, DailyCaseCount, DengueStat, RiskPrediction, WeatherObservation
 
-admin.site.register(DengueStat)
\ No newline at end of file
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """
+    View-only: daily case counts are written through
+    planner.services.case_windows.record_daily_cases (e.g. import_dengue_stats)
+    so the window summaries stay in step; editing them here would bypass it.
+    """
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(DengueStat)
+admin.site.register(WeatherObservation)
+admin.site.register(RiskPrediction)
+admin.site.register(DailyCaseCount, ReadOnlyAdmin)
+admin.site.register(CaseWindowSummary, ReadOnlyAdmin)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PlannerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'planner'
+
+    def ready(self):
+        import planner.signals
+        from planner.services import model_registry
+        model_registry.warm()
@@ -0,0 +1,70 @@
+# planner/geo.py
+"""
+Web-Mercator tile / quadkey helpers (same scheme as the Leaflet/OSM tiles).
+
+A quadkey is a base-4 string where each character picks one quadrant of the
+parent tile, so every prefix of a point's quadkey is the tile containing it
+at that zoom level, and all points inside a tile form one contiguous range
+of quadkeys -- which an ordinary B-tree index can answer.
+"""
+import math
+
+QUADKEY_LEVEL = 18            # ~150 m tiles at the equator
+MAX_LATITUDE = 85.05112878    # Web-Mercator limit
+
+
+def latlng_to_tile(lat, lng, level):
+    """Tile (x, y) containing the point at ``level``."""
+    lat = min(max(lat, -MAX_LATITUDE), MAX_LATITUDE)
+    n = 1 << level
+    x = (lng + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return (min(n - 1, max(0, int(x * n))), min(n - 1, max(0, int(y * n))))
+
+
+def tile_to_quadkey(x, y, level):
+    digits = []
+    for i in range(level, 0, -1):
+        mask = 1 << (i - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
+
+
+def quadkey_to_tile(quadkey):
+    """Inverse of tile_to_quadkey: (x, y, level)."""
+    x = y = 0
+    level = len(quadkey)
+    for i, digit in enumerate(quadkey):
+        mask = 1 << (level - i - 1)
+        if digit in "13":
+            x |= mask
+        if digit in "23":
+            y |= mask
+    return x, y, level
+
+
+def quadkey_for(lat, lng, level=QUADKEY_LEVEL):
+    return tile_to_quadkey(*latlng_to_tile(lat, lng, level), level)
+
+
+def tile_bounds(x, y, level):
+    """(west, south, east, north) of a tile in degrees."""
+    n = 1 << level
+
+    def lat_at(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return (x / n * 360.0 - 180.0, lat_at(y + 1), (x + 1) / n * 360.0 - 180.0, lat_at(y))
+
+
+def tiles_covering(west, south, east, north, level):
+    """All (x, y) tiles at ``level`` intersecting the bounding box."""
+    x0, y0 = latlng_to_tile(north, west, level)
+    x1, y1 = latlng_to_tile(south, east, level)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def quadkey_range(prefix):
+    """Half-open [low, high) string range holding every quadkey under ``prefix``."""
+    return prefix, prefix + "4"
@@ -0,0 +1,324 @@
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.services import aqi, history
+from planner.services.risk_scoring import NUMERIC_COLUMNS, risk_labels
+
+
+def legacy_aggregate_hourly_to_daily(times, pm25_vals, pm10_vals, min_hours=history.MIN_HOURLY_FOR_DAILY):
+    """The per-sample loop history.aggregate_hourly_to_daily replaced (reference for timings/equality)."""
+    daily25 = defaultdict(list)
+    daily10 = defaultdict(list)
+    hour_counts = defaultdict(int)
+
+    for t, p25, p10 in zip(times, pm25_vals, pm10_vals):
+        if not t:
+            continue
+        date_key = t[:10]
+        if p25 is not None:
+            try:
+                daily25[date_key].append(float(p25))
+            except:
+                pass
+        if p10 is not None:
+            try:
+                daily10[date_key].append(float(p10))
+            except:
+                pass
+        if (p25 is not None) or (p10 is not None):
+            hour_counts[date_key] += 1
+
+    pm25_daily, pm10_daily, pm25_max, pm10_max = {}, {}, {}, {}
+    all_dates = sorted(set(list(daily25.keys()) + list(daily10.keys()) + list(hour_counts.keys())))
+    for d in all_dates:
+        if hour_counts.get(d, 0) < min_hours:
+            pm25_daily[d] = pm10_daily[d] = pm25_max[d] = pm10_max[d] = None
+            continue
+        if daily25.get(d):
+            pm25_daily[d] = sum(daily25[d]) / len(daily25[d])
+            pm25_max[d] = max(daily25[d])
+        else:
+            pm25_daily[d] = pm25_max[d] = None
+        if daily10.get(d):
+            pm10_daily[d] = sum(daily10[d]) / len(daily10[d])
+            pm10_max[d] = max(daily10[d])
+        else:
+            pm10_daily[d] = pm10_max[d] = None
+    return pm25_daily, pm10_daily, pm25_max, pm10_max, hour_counts
+
+
+# Breakpoint tables and category chain exactly as the collector had them
+# (kept separate from planner.services.aqi so the comparison isn't circular)
+LEGACY_PM25_BREAKPOINTS = [
+    (0.0, 12.0, 0, 50),
+    (12.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 150.4, 151, 200),
+    (150.5, 250.4, 201, 300),
+    (250.5, 350.4, 301, 400),
+    (350.5, 500.4, 401, 500),
+]
+
+LEGACY_PM10_BREAKPOINTS = [
+    (0, 54, 0, 50),
+    (55, 154, 51, 100),
+    (155, 254, 101, 150),
+    (255, 354, 151, 200),
+    (355, 424, 201, 300),
+    (425, 504, 301, 400),
+    (505, 604, 401, 500),
+]
+
+
+def legacy_aqi_subindex(conc, breakpoints):
+    if conc is None:
+        return None
+    for bp_lo, bp_hi, i_lo, i_hi in breakpoints:
+        if bp_lo <= conc <= bp_hi:
+            aqi = ((i_hi - i_lo) / (bp_hi - bp_lo)) * (conc - bp_lo) + i_lo
+            return int(round(aqi))
+    bp_lo, bp_hi, i_lo, i_hi = breakpoints[-1]
+    aqi = ((i_hi - i_lo) / (bp_hi - bp_lo)) * (conc - bp_lo) + i_lo
+    return int(round(min(aqi, 500)))
+
+
+def legacy_aqi_category(aqi):
+    if aqi is None:
+        return None
+    if aqi <= 50: return "Good"
+    if aqi <= 100: return "Moderate"
+    if aqi <= 150: return "Unhealthy for Sensitive Groups"
+    if aqi <= 200: return "Unhealthy"
+    if aqi <= 300: return "Very Unhealthy"
+    return "Hazardous"
+
+
+def legacy_compute_daily_aqi(pm25_daily, pm10_daily):
+    """The per-day scan/sort aqi.daily_aqi replaced: {date: (AQI, category, dominant)}."""
+    out = {}
+    for d in sorted(set(pm25_daily) | set(pm10_daily)):
+        c25, c10 = pm25_daily.get(d), pm10_daily.get(d)
+        candidates = []
+        if c25 is not None:
+            candidates.append(("PM2.5", legacy_aqi_subindex(c25, LEGACY_PM25_BREAKPOINTS)))
+        if c10 is not None:
+            candidates.append(("PM10", legacy_aqi_subindex(c10, LEGACY_PM10_BREAKPOINTS)))
+        if not candidates:
+            out[d] = (None, None, None)
+            continue
+        candidates.sort(key=lambda x: (x[1], x[0] != "PM2.5"), reverse=True)
+        name, value = candidates[0]
+        out[d] = (value, legacy_aqi_category(value), name)
+    return out
+
+
+def legacy_calculate_risk(row):
+    """The row-wise scorer risk_scoring.risk_labels replaced (used with df.apply(axis=1))."""
+    score = 0
+
+    # Temperature (0–25)
+    temp = row['temp_mean_C']
+    if temp < 20:
+        temp_score = 0
+    elif temp < 26:
+        temp_score = (temp - 20) / 6
+    elif temp <= 30:
+        temp_score = 1.0
+    elif temp < 33:
+        temp_score = (33 - temp) / 3
+    else:
+        temp_score = 0
+    score += 25 * temp_score
+
+    # Rainfall (0–20)
+    rain = row['rainfall_mm']
+    if rain < 1:
+        rain_score = 0
+    elif rain <= 60:
+        rain_score = rain / 60
+    elif rain <= 100:
+        rain_score = 1.0
+    else:
+        rain_score = max(0, 1 - (rain - 100) / 100)
+    score += 20 * rain_score
+
+    # Humidity (0–15)
+    hum = row['humidity_percent']
+    if hum < 60:
+        hum_score = 0
+    elif hum < 80:
+        hum_score = (hum - 60) / 20
+    else:
+        hum_score = 1.0
+    score += 15 * hum_score
+
+    # PM2.5 (0–15)
+    pm25 = row['pm25']
+    if pm25 < 15:
+        pm25_score = 0
+    elif pm25 < 50:
+        pm25_score = (pm25 - 15) / 35
+    else:
+        pm25_score = 1.0
+    score += 15 * pm25_score
+
+    # PM10 (0–10)
+    pm10 = row['pm10']
+    if pm10 < 30:
+        pm10_score = 0
+    elif pm10 < 100:
+        pm10_score = (pm10 - 30) / 70
+    else:
+        pm10_score = 1.0
+    score += 10 * pm10_score
+
+    # Wind (0–10)
+    wind = row['wind_speed_kph']
+    if wind <= 5:
+        wind_score = 1.0
+    elif wind < 20:
+        wind_score = (20 - wind) / 15
+    else:
+        wind_score = 0
+    score += 10 * wind_score
+
+    # UV (0–5)
+    uv = row['uv_index']
+    if uv <= 3:
+        uv_score = 1.0
+    elif uv < 9:
+        uv_score = (9 - uv) / 6
+    else:
+        uv_score = 0
+    score += 5 * uv_score
+
+    # Classification
+    if score <= 20:
+        risk = "Very Low"
+    elif score <= 40:
+        risk = "Low"
+    elif score <= 60:
+        risk = "Moderate"
+    elif score <= 80:
+        risk = "High"
+    else:
+        risk = "Very High"
+
+    return risk
+
+
+def synthetic_weather(rows, seed=0):
+    """Daily weather/air rows spanning every branch of the risk rules, ~2% missing."""
+    rng = np.random.default_rng(seed)
+    ranges = {
+        'temp_mean_C': (10, 40), 'rainfall_mm': (0, 250), 'humidity_percent': (30, 100),
+        'pm25': (0, 120), 'pm10': (0, 200), 'wind_speed_kph': (0, 35), 'uv_index': (0, 12),
+    }
+    df = pd.DataFrame({col: rng.uniform(lo, hi, rows).round(2) for col, (lo, hi) in ranges.items()})
+    return df.mask(rng.random(df.shape) < 0.02)
+
+
+def synthetic_hourly(days, seed, missing=0.1):
+    """(times, pm25, pm10) lists shaped like an Open-Meteo air-quality response."""
+    rnd = random.Random(seed)
+    start = datetime(2022, 1, 1)
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(days * 24)]
+    pm25 = [None if rnd.random() < missing else round(rnd.uniform(0, 400), 1) for _ in times]
+    pm10 = [None if rnd.random() < missing else round(rnd.uniform(0, 600), 1) for _ in times]
+    return times, pm25, pm10
+
+
+class Command(BaseCommand):
+    help = "Time the vectorized data-pipeline steps against the implementations they replaced"
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=["aggregate", "aqi", "risk"],
+                            help="aggregate: hourly -> daily PM aggregation; aqi: daily US-EPA AQI from PM; "
+                                 "risk: rule-based risk labels")
+        parser.add_argument("--days", type=int, default=3 * 365, help="Days of hourly data per location")
+        parser.add_argument("--locations", type=int, default=30, help="Number of synthetic locations")
+        parser.add_argument("--repeat", type=int, default=3, help="Best of N runs (default: 3)")
+        parser.add_argument("--rows", default="10000,1000000,10000000",
+                            help="risk: comma-separated dataset sizes (default: 10k, 1M, 10M)")
+        parser.add_argument("--legacy-max-rows", type=int, default=100000,
+                            help="risk: run the row-wise scorer only up to this size; larger ones are "
+                                 "extrapolated from its per-row rate (default: 100000)")
+
+    def handle(self, *args, **kwargs):
+        if min(kwargs["days"], kwargs["locations"], kwargs["repeat"]) < 1:
+            raise CommandError("--days, --locations and --repeat must be positive")
+        getattr(self, f"bench_{kwargs['target']}")(**kwargs)
+
+    def best_of(self, repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings), result
+
+    def report(self, label, legacy, vectorized, identical):
+        self.stdout.write(f"  legacy:     {legacy:.3f}s")
+        self.stdout.write(f"  vectorized: {vectorized:.3f}s ({legacy / vectorized:.1f}x)")
+        if identical:
+            self.stdout.write(self.style.SUCCESS(f"✅ {label}: outputs identical"))
+        else:
+            self.stdout.write(self.style.ERROR(f"❌ {label}: outputs differ"))
+
+    def bench_aggregate(self, days, locations, repeat, **kwargs):
+        inputs = [synthetic_hourly(days, seed) for seed in range(locations)]
+        self.stdout.write(f"Aggregating {locations} x {days * 24} hourly samples")
+
+        legacy_time, expected = self.best_of(repeat, lambda: [legacy_aggregate_hourly_to_daily(*i) for i in inputs])
+        new_time, actual = self.best_of(repeat, lambda: [history.aggregate_hourly_to_daily(*i) for i in inputs])
+        identical = all(
+            list(map(dict, old)) == list(map(dict, new)) for old, new in zip(expected, actual)
+        )
+        self.report("aggregate_hourly_to_daily", legacy_time, new_time, identical)
+
+    def bench_aqi(self, days, locations, repeat, **kwargs):
+        rnd = random.Random(0)
+        keys = [f"{loc}:{day}" for loc in range(locations) for day in range(days)]
+        pm25 = {k: None if rnd.random() < 0.05 else round(rnd.uniform(0, 550), 1) for k in keys}
+        pm10 = {k: None if rnd.random() < 0.05 else round(rnd.uniform(0, 650), 1) for k in keys}
+        self.stdout.write(f"AQI for {len(keys)} location-days")
+
+        def vectorized():
+            result = aqi.daily_aqi([pm25[k] for k in keys], [pm10[k] for k in keys])
+            return dict(zip(keys, zip(aqi.as_ints(result["aqi"]), result["category"], result["dominant"])))
+
+        legacy_time, expected = self.best_of(repeat, lambda: legacy_compute_daily_aqi(pm25, pm10))
+        new_time, actual = self.best_of(repeat, vectorized)
+        self.report("daily_aqi", legacy_time, new_time, expected == actual)
+
+    def bench_risk(self, rows, legacy_max_rows, repeat, **kwargs):
+        try:
+            sizes = [int(n) for n in rows.split(",")]
+        except ValueError:
+            raise CommandError("--rows must be comma-separated integers")
+
+        legacy_rate = legacy_size = None     # seconds per row of the largest measured run
+        for size in sizes:
+            df = synthetic_weather(size)
+            self.stdout.write(f"Labelling {size} rows")
+            new_time, actual = self.best_of(repeat, lambda: risk_labels(df))
+            if size > legacy_max_rows:
+                self.stdout.write(f"  vectorized: {new_time:.3f}s")
+                if legacy_rate:
+                    self.stdout.write(f"  legacy:     ~{legacy_rate * size:.1f}s EXTRAPOLATED from the "
+                                      f"{legacy_size}-row run, not measured "
+                                      f"(~{legacy_rate * size / new_time:.0f}x)")
+                continue
+
+            legacy_df = df.copy()
+            legacy_df[NUMERIC_COLUMNS] = legacy_df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+            legacy_time, expected = self.best_of(1, lambda: legacy_df.apply(legacy_calculate_risk, axis=1))
+            legacy_rate, legacy_size = legacy_time / size, size
+            self.report(f"risk labels ({size} rows)", legacy_time, new_time,
+                        (expected.to_numpy() == actual).all())
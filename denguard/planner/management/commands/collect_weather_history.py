@@ -0,0 +1,119 @@
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.services import datasets, history, upstream
+from planner.services.response_cache import ResponseCache
+
+
+class Command(BaseCommand):
+    help = ("Collect daily historical weather, humidity/UV and PM/AQI per location into a CSV "
+            "or a partitioned Parquet/Feather dataset. "
+            "Units of (location, source, date chunk) are fetched in parallel and checkpointed; "
+            "re-run the same command to resume after a failure.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--locations", default="",
+                            help="Comma-separated location names (default: Delhi,Mumbai; 'all' for every known city)")
+        parser.add_argument("--start", default=history.START_DATE, help=f"First day (default: {history.START_DATE})")
+        parser.add_argument("--end", default=None,
+                            help=f"Last day (default: {history.END_DATE}; yesterday with --incremental)")
+        parser.add_argument("--timezone", default=history.TIMEZONE, help=f"Local day boundaries (default: {history.TIMEZONE})")
+        parser.add_argument("--chunk-days", type=int, default=history.CHUNK_DAYS,
+                            help=f"Days per request (default: {history.CHUNK_DAYS})")
+        parser.add_argument("--workers", type=int, default=6, help="Concurrent requests (default: 6)")
+        parser.add_argument("--output", default=history.OUTPUT_CSV,
+                            help=f"CSV path, or a dataset directory for --format (default: {history.OUTPUT_CSV})")
+        parser.add_argument("--format", choices=list(datasets.FORMATS), default="parquet",
+                            help="Columnar format when --output isn't a .csv file (default: parquet)")
+        parser.add_argument("--checkpoint-dir", default=str(Path(settings.BASE_DIR) / "cache" / "collector"),
+                            help="Where finished units are stored (default: cache/collector)")
+        parser.add_argument("--fresh", action="store_true", help="Ignore existing checkpoints and fetch everything")
+        parser.add_argument("--response-cache-dir", default=str(Path(settings.BASE_DIR) / "cache" / "responses"),
+                            help="Content-addressed cache of raw upstream responses (default: cache/responses)")
+        parser.add_argument("--no-response-cache", action="store_true", help="Always go to the network")
+        parser.add_argument("--no-compress", action="store_true", help="Store cached responses uncompressed")
+        parser.add_argument("--offline", action="store_true",
+                            help="Replay from the response cache only; uncached requests fail instead of fetching")
+        parser.add_argument("--incremental", action="store_true",
+                            help="Only fetch the days each location is missing from --output and upsert them into it")
+
+    def handle(self, *args, **kwargs):
+        try:
+            datasets.check_supported(kwargs["output"])
+        except ImportError as e:
+            raise CommandError(str(e))
+        try:
+            names = [n.strip() for n in kwargs["locations"].split(",") if n.strip()]
+            locations = history.resolve_locations(names)
+            if kwargs["incremental"]:
+                end = kwargs["end"] or (date.today() - timedelta(days=1)).isoformat()
+                last_dates = history.last_collected_dates(kwargs["output"])
+                units = history.plan_incremental_units(locations, last_dates, kwargs["start"], end, kwargs["chunk_days"])
+            else:
+                units = history.plan_units(locations, kwargs["start"], kwargs["end"] or history.END_DATE,
+                                           kwargs["chunk_days"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if kwargs["workers"] < 1 or kwargs["chunk_days"] < 1:
+            raise CommandError("--workers and --chunk-days must be positive")
+        if kwargs["offline"] and kwargs["no_response_cache"]:
+            raise CommandError("--offline needs the response cache")
+
+        started = time.monotonic()
+        done = 0
+
+        def progress(unit, status):
+            nonlocal done
+            done += 1
+            self.stdout.write(f"  [{done}/{len(units)}] {unit.location} {unit.source} {unit.start}..{unit.end}: {status}")
+
+        session = upstream.new_session(user_agent="denguard-collector/1.0", pool_maxsize=kwargs["workers"])
+        cache = None
+        if not kwargs["no_response_cache"]:
+            cache = ResponseCache(kwargs["response_cache_dir"], compress=not kwargs["no_compress"],
+                                  offline=kwargs["offline"])
+        results, failures = history.collect(
+            units, kwargs["checkpoint_dir"], workers=kwargs["workers"], timezone=kwargs["timezone"],
+            resume=not kwargs["fresh"], session=session, cache=cache, progress=progress,
+        )
+
+        all_data = []
+        failed_locations = {unit.location for unit in failures}
+        for loc in locations:
+            if kwargs["incremental"] and loc["name"] in failed_locations:
+                # leave its rows alone; the next run retries the same days
+                self.stdout.write(f"{loc['name']}: skipped (incomplete)")
+                continue
+            rows = history.location_rows(results, loc["name"])
+            self.stdout.write(f"{loc['name']}: {len(rows)} days")
+            all_data.extend(rows)
+
+        output = kwargs["output"]
+        if not kwargs["incremental"]:
+            datasets.save(pd.DataFrame(all_data), output, format=kwargs["format"])
+            summary = f"Saved '{output}' ({len(all_data)} rows)"
+        elif all_data:
+            total = datasets.upsert(output, all_data)
+            summary = f"Upserted {len(all_data)} rows into '{output}' ({total} rows)"
+        else:
+            summary = f"'{output}' is already up to date"
+
+        for unit, error in failures.items():
+            self.stderr.write(f"  failed {unit.location} {unit.source} {unit.start}..{unit.end}: {error}")
+        for host, acc in upstream.stats().items():
+            self.stdout.write(f"  {host}: {acc['requests']} requests, {acc['errors']} errors, "
+                              f"{acc['bytes'] / 1024:.1f} KiB, avg {acc['seconds_avg']:.2f}s, max {acc['seconds_max']:.2f}s")
+
+        if cache is not None:
+            self.stdout.write(f"  response cache: {cache.hits} hits, {cache.misses} fetched")
+        summary += f" in {time.monotonic() - started:.1f}s"
+        if failures:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {summary}; {len(failures)}/{len(units)} units failed -- run again to resume"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {summary}"))
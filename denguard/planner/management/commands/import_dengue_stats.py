@@ -1,29 +1,143 @@
 import csv
-from django.core.management.base import BaseCommand
-from planner.models import DengueStat
+import time
+from datetime import date
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from planner.models import DailyCaseCount, DengueStat
+from planner.services import heat_tiles
+from planner.services.case_windows import record_daily_cases
+from planner.services.dengue_cache import bump_data_version
+
+VALUE_FIELDS = ["longitude", "latitude", "total", "dead", "male", "female", "quadkey", "updated_at"]
+# Above this many changed points it's cheaper to drop all tiles than to find the affected ones
+TILE_INVALIDATION_LIMIT = 1000
+
+
+def parse_row(row):
+    stat = DengueStat(
+        location_name=row['location_name'],
+        longitude=float(row['longitude']),
+        latitude=float(row['latitude']),
+        total=int(row['total']),
+        dead=int(row.get('dead') or 0),
+        male=int(row.get('male') or 0),
+        female=int(row.get('female') or 0),
+    )
+    stat.compute_quadkey()   # bulk operations bypass save()
+    return stat
+
+
+def parse_daily_row(row):
+    return DailyCaseCount(
+        location=row['location_name'],
+        date=date.fromisoformat(row['date']),
+        total=int(row['total']),
+        dead=int(row.get('dead') or 0),
+    )
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
 
 class Command(BaseCommand):
-    help = "Import Dengue statistics from CSV"
+    help = ("Import Dengue statistics from CSV (streamed, batched, idempotent). "
+            "Files with a `date` column are daily case counts and go to DailyCaseCount.")
 
     def add_arguments(self, parser):
         parser.add_argument("csv_file", type=str, help="Path to the CSV file")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows per bulk INSERT/UPDATE (default: 1000)")
+        parser.add_argument("--mode", choices=["upsert", "insert"], default="upsert",
+                            help="upsert: update existing rows with the same location_name, insert the rest "
+                                 "(safe to re-run, default); insert: always append new rows")
 
     def handle(self, *args, **kwargs):
         csv_file_path = kwargs['csv_file']
+        batch_size = kwargs['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
 
-        with open(csv_file_path, newline='', encoding='utf-8') as csvfile:
+        started = time.monotonic()
+        created = updated = 0
+        touched = []   # map positions whose tiles must be re-rendered
+
+        # One transaction: a failing row leaves the table as it was
+        with open(csv_file_path, newline='', encoding='utf-8') as csvfile, transaction.atomic():
             reader = csv.DictReader(csvfile)
-            count = 0
-            for row in reader:
-                DengueStat.objects.create(
-                    location_name=row['location_name'],
-                    longitude=float(row['longitude']),
-                    latitude=float(row['latitude']),
-                    total=int(row['total']),
-                    dead=int(row['dead']),
-                    male=int(row['male']),
-                    female=int(row['female']),
-                )
-                count += 1
-
-        self.stdout.write(self.style.SUCCESS(f"✅ Successfully imported {count} records."))
+            if "date" in (reader.fieldnames or []):
+                return self.import_daily(reader, batch_size, started)
+
+            for line_chunk in chunked(reader, batch_size):
+                try:
+                    parsed = [parse_row(row) for row in line_chunk]
+                except (KeyError, ValueError) as e:
+                    raise CommandError(f"Bad row near line {reader.line_num}: {e}")
+
+                if kwargs['mode'] == "insert":
+                    # every row is appended, repeated locations included
+                    new, existing = parsed, []
+                else:
+                    # last occurrence wins when a location repeats inside the file
+                    stats = {s.location_name: s for s in parsed}
+                    new, existing = self.split_existing(stats, touched)
+
+                DengueStat.objects.bulk_create(new, batch_size=batch_size)
+                DengueStat.objects.bulk_update(existing, VALUE_FIELDS, batch_size=batch_size)
+                created += len(new)
+                updated += len(existing)
+                touched.extend(s.map_latlng for s in new + existing)
+
+        bump_data_version()
+        if len(touched) > TILE_INVALIDATION_LIMIT:
+            heat_tiles.invalidate_all()
+        else:
+            for lat, lng in set(touched):
+                heat_tiles.invalidate_point(lat, lng)
+
+        elapsed = time.monotonic() - started
+        count = created + updated
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Successfully imported {count} records ({created} created, {updated} updated) "
+            f"in {elapsed:.2f}s — {count / elapsed if elapsed else count:.0f} rows/s."
+        ))
+
+    def import_daily(self, reader, batch_size, started):
+        """(location, date) rows are upserted; rolling-window summaries follow incrementally."""
+        count = 0
+        for line_chunk in chunked(reader, batch_size):
+            try:
+                days = [parse_daily_row(row) for row in line_chunk]
+            except (KeyError, ValueError) as e:
+                raise CommandError(f"Bad row near line {reader.line_num}: {e}")
+            count += record_daily_cases(days)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Successfully imported {count} daily case counts "
+            f"in {elapsed:.2f}s — {count / elapsed if elapsed else count:.0f} rows/s."
+        ))
+
+    def split_existing(self, stats, touched):
+        """Partition a chunk into new rows and rows updating an existing location."""
+        now = timezone.now()
+        existing_rows = DengueStat.objects.filter(location_name__in=stats).values_list(
+            "location_name", "id", "longitude", "latitude"
+        )
+        new, existing = [], []
+        known = {name: (pk, (lat, lng)) for name, pk, lat, lng in existing_rows}
+        for name, stat in stats.items():
+            if name in known:
+                stat.pk, old_position = known[name]
+                stat.updated_at = now   # bulk_update doesn't apply auto_now
+                touched.append(old_position)
+                existing.append(stat)
+            else:
+                new.append(stat)
+        return new, existing
@@ -0,0 +1,45 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from planner.services import snapshots
+
+
+class Command(BaseCommand):
+    help = "Periodically precompute weather, air quality and risk level for every known city"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=15 * 60,
+                            help="Seconds between refresh rounds (default: 900)")
+        parser.add_argument("--workers", type=int, default=4,
+                            help="Cities refreshed in parallel (default: 4)")
+        parser.add_argument("--once", action="store_true",
+                            help="Run a single refresh round and exit")
+
+    def handle(self, *args, **kwargs):
+        interval = kwargs["interval"]
+        workers = kwargs["workers"]
+
+        while True:
+            started = time.monotonic()
+            self.refresh_all(workers)
+            if kwargs["once"]:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def refresh_all(self, workers):
+        cities = snapshots.known_cities()
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(snapshots.refresh_snapshot, cities))
+
+        failed = 0
+        for city, data in zip(cities, results):
+            if "error" in data:
+                failed += 1
+                self.stderr.write(f"  {city}: {data['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Refreshed {len(cities) - failed}/{len(cities)} cities "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
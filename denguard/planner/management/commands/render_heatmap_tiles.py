@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from planner.models import DengueStat
+from planner.services import heat_tiles
+
+
+class Command(BaseCommand):
+    help = "Pre-generate the heatmap raster tiles that contain data, for low zoom levels"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-zoom", type=int, default=8,
+                            help="Highest zoom level to render (default: 8)")
+        parser.add_argument("--force", action="store_true",
+                            help="Re-render tiles that are already cached")
+
+    def handle(self, *args, **kwargs):
+        max_zoom = min(kwargs["max_zoom"], heat_tiles.MAX_TILE_ZOOM)
+        # `longitude` holds the map latitude (see DengueStat)
+        rows = np.array(DengueStat.objects.values_list("longitude", "latitude", "total"), dtype=np.float64).reshape(-1, 3)
+        lat, lng, total = rows[:, 0], rows[:, 1], rows[:, 2]
+
+        started = time.monotonic()
+        rendered = skipped = 0
+        for z in range(max_zoom + 1):
+            # every tile whose area (plus kernel margin) holds at least one point
+            for x, y in heat_tiles.tiles_near(lat, lng, z).tolist():
+                if not kwargs["force"] and heat_tiles.tile_path(z, x, y).exists():
+                    skipped += 1
+                    continue
+                heat_tiles.write_tile(z, x, y, heat_tiles.render_tile(z, x, y, (lat, lng, total)))
+                rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rendered {rendered} tiles (skipped {skipped} cached) up to zoom {max_zoom} "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
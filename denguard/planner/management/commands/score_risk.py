@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.services import datasets
+from planner.services.risk_scoring import label_dataset
+
+
+class Command(BaseCommand):
+    help = "Add the rule-based dengue risk label ('risk' column) to a weather dataset (CSV or Parquet/Feather)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", nargs="?", default="prediction dataset.csv",
+                            help="Input CSV or dataset directory (default: 'prediction dataset.csv')")
+        parser.add_argument("--output", default="prediction_dataset_with_risk.csv",
+                            help="Output CSV or dataset directory (default: prediction_dataset_with_risk.csv)")
+        parser.add_argument("--format", choices=list(datasets.FORMATS), default="parquet",
+                            help="Columnar format when --output isn't a .csv file (default: parquet)")
+
+    def handle(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            df = datasets.load(kwargs["input"])
+        except (ImportError, OSError, ValueError) as e:
+            raise CommandError(f"Cannot read '{kwargs['input']}': {e}")
+        try:
+            df = label_dataset(df)
+        except KeyError as e:
+            raise CommandError(f"'{kwargs['input']}' is missing column(s): {e}")
+        try:
+            datasets.save(df, kwargs["output"], format=kwargs["format"])
+        except (ImportError, OSError, ValueError) as e:
+            raise CommandError(f"Cannot write '{kwargs['output']}': {e}")
+
+        counts = df["risk"].value_counts()
+        for level, count in counts.items():
+            self.stdout.write(f"  {level}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Risk column added to {len(df)} rows in {time.monotonic() - started:.2f}s -> '{kwargs['output']}'"
+        ))
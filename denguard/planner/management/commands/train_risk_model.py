@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.services import training
+
+
+class Command(BaseCommand):
+    help = ("Train the SVM risk model: parallel hyperparameter search with cached preprocessing, "
+            "written to a versioned artifact directory (model + metadata); --promote serves it. "
+            "--incremental warm-starts from the latest artifact and only searches again on drift or schedule.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", nargs="?",
+                            default=str(Path(settings.BASE_DIR) / "planner" / "data" / "prediction_dataset_with_risk.csv"),
+                            help="Labelled CSV or dataset directory (default: planner/data/prediction_dataset_with_risk.csv)")
+        parser.add_argument("--n-jobs", type=int, default=-1, help="Search workers (default: -1 = all cores)")
+        parser.add_argument("--n-iter", type=int, default=training.N_ITER,
+                            help=f"Hyperparameter candidates (default: {training.N_ITER})")
+        parser.add_argument("--cv", type=int, default=training.CV_FOLDS,
+                            help=f"Cross-validation folds (default: {training.CV_FOLDS})")
+        parser.add_argument("--random-state", type=int, default=training.RANDOM_STATE,
+                            help=f"Seed for the split and the search (default: {training.RANDOM_STATE})")
+        parser.add_argument("--cache-dir", default=str(Path(settings.BASE_DIR) / "cache" / "training"),
+                            help="Cache of fitted preprocessing steps (default: cache/training)")
+        parser.add_argument("--no-cache", action="store_true", help="Refit preprocessing for every candidate")
+        parser.add_argument("--artifacts-dir", default=str(training.ARTIFACTS_DIR),
+                            help="Where versioned artifacts are written (default: planner/model/artifacts)")
+        parser.add_argument("--artifact-version", default=None, help="Artifact version (default: UTC timestamp)")
+        parser.add_argument("--incremental", action="store_true",
+                            help="Reuse the base artifact's params and preprocessing, updated with the new days")
+        parser.add_argument("--base", default=None,
+                            help="Artifact version to warm-start from (default: the latest one)")
+        parser.add_argument("--full-every-days", type=int, default=training.FULL_SEARCH_EVERY_DAYS,
+                            help=f"Force a full search when the last one is this old "
+                                 f"(default: {training.FULL_SEARCH_EVERY_DAYS})")
+        parser.add_argument("--drift-threshold", type=float, default=training.DRIFT_THRESHOLD,
+                            help=f"Mean shift of a feature, in stds, that forces a full search; small "
+                                 f"batches get {training.DRIFT_CONFIDENCE_Z:g}/sqrt(rows) on top "
+                                 f"(default: {training.DRIFT_THRESHOLD})")
+        parser.add_argument("--promote", action="store_true",
+                            help="Atomically replace RISK_MODEL_PATH with the new model")
+
+    def handle(self, *args, **kwargs):
+        if kwargs["n_iter"] < 1 or kwargs["cv"] < 2:
+            raise CommandError("--n-iter must be positive and --cv at least 2")
+        try:
+            df = training.load_training_data(kwargs["input"])
+        except (ImportError, FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Training on {len(df)} rows from '{kwargs['input']}' (n_jobs={kwargs['n_jobs']})")
+
+        options = dict(
+            n_jobs=kwargs["n_jobs"], cache_dir=None if kwargs["no_cache"] else kwargs["cache_dir"],
+            n_iter=kwargs["n_iter"], cv=kwargs["cv"], random_state=kwargs["random_state"],
+        )
+        base = None
+        if kwargs["incremental"]:
+            if kwargs["base"]:
+                base = Path(kwargs["artifacts_dir"]) / kwargs["base"]
+                if not (base / training.METADATA_FILE).exists():
+                    raise CommandError(f"no artifact '{kwargs['base']}' in {kwargs['artifacts_dir']}")
+            else:
+                base = training.latest_artifact(kwargs["artifacts_dir"])
+            if base is None:
+                self.stdout.write("  no previous artifact; running a full search")
+        if base is not None:
+            model, metadata = training.retrain(
+                df, base, full_every_days=kwargs["full_every_days"],
+                drift_threshold=kwargs["drift_threshold"], **options,
+            )
+        else:
+            model, metadata = training.train(df, **options)
+        metadata["data"]["source"] = os.path.abspath(kwargs["input"])
+        folder = training.save_artifact(model, metadata, kwargs["artifact_version"], kwargs["artifacts_dir"])
+
+        timings, metrics = metadata["timings"], metadata["metrics"]
+        if metadata["mode"] == "incremental":
+            self.stdout.write(f"  warm start from {metadata['base_version']}: {metadata['data']['new_rows']} new rows, "
+                              f"saved ~{timings['seconds_saved']:.1f}s of a full search")
+        elif "full_search_reason" in metadata:
+            self.stdout.write(f"  full search: {metadata['full_search_reason']}")
+        cv = f" (cv accuracy {metrics['cv_best_accuracy']:.4f})" if "cv_best_accuracy" in metrics else ""
+        self.stdout.write(f"  best params: {metadata['best_params']}{cv}")
+        self.stdout.write(f"  test accuracy: {metrics['accuracy']:.4f}")
+        self.stdout.write(f"  fit {timings['fit_seconds']:.1f}s, "
+                          f"inference {timings['inference_us_per_row']:.0f}µs/row over {timings['inference_rows']} rows")
+        summary = f"Model saved to '{folder}'"
+        if kwargs["promote"]:
+            training.promote(folder, settings.RISK_MODEL_PATH)
+            summary += f" and promoted to '{settings.RISK_MODEL_PATH}'"
+        self.stdout.write(self.style.SUCCESS(f"✅ {summary}"))
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='denguestat',
+            name='year',
+        ),
+        migrations.CreateModel(
+            name='RiskPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('risk_level', models.CharField(max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'date'), name='riskpred_location_date_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeatherObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('rainfall_mm', models.FloatField(blank=True, null=True)),
+                ('humidity_percent', models.FloatField(blank=True, null=True)),
+                ('temp_min_C', models.FloatField(blank=True, null=True)),
+                ('temp_max_C', models.FloatField(blank=True, null=True)),
+                ('temp_mean_C', models.FloatField(blank=True, null=True)),
+                ('wind_speed_kph', models.FloatField(blank=True, null=True)),
+                ('wind_direction_deg', models.FloatField(blank=True, null=True)),
+                ('uv_index', models.FloatField(blank=True, null=True)),
+                ('pm25', models.FloatField(blank=True, null=True)),
+                ('pm10', models.FloatField(blank=True, null=True)),
+                ('aqi', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'date'), name='weatherobs_location_date_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+from planner.geo import quadkey_for
+
+
+def backfill_quadkeys(apps, schema_editor):
+    DengueStat = apps.get_model('planner', 'DengueStat')
+    rows = list(DengueStat.objects.only('id', 'longitude', 'latitude'))
+    for row in rows:
+        # `longitude` holds the map latitude (see DengueStat)
+        row.quadkey = quadkey_for(row.longitude, row.latitude)
+    DengueStat.objects.bulk_update(rows, ['quadkey'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0002_weather_observation_risk_prediction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='denguestat',
+            name='quadkey',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=18),
+        ),
+        migrations.RunPython(backfill_quadkeys, migrations.RunPython.noop),
+    ]
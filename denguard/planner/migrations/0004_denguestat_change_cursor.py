@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # existing rows haven't changed since they were created
+    DengueStat = apps.get_model('planner', 'DengueStat')
+    DengueStat.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0003_denguestat_quadkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='denguestat',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='denguestat',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='denguestat',
+            index=models.Index(fields=['updated_at', 'id'], name='denguestat_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0004_denguestat_change_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseWindowSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=255)),
+                ('window', models.CharField(choices=[('7d', 'Last 7 days'), ('30d', 'Last 30 days'), ('season', 'Season to date')], max_length=10)),
+                ('as_of', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('dead', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('window', 'location'), name='casewindow_window_location_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCaseCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField()),
+                ('dead', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'date'), name='dailycases_location_date_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0005_daily_case_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherobservation',
+            name='missing_sources',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
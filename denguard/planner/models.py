@@ -1,7 +1,13 @@
 # planner/models.py
 from django.db import models
+from django.db.models import OuterRef, Subquery
+
+from .geo import quadkey_for
 
 class DengueStat(models.Model):
+    # NB: the source CSV (and so these columns) has the axes swapped --
+    # `longitude` holds the map latitude and `latitude` the map longitude.
+    # The heatmap API emits [longitude, latitude], i.e. Leaflet's [lat, lng].
     location_name = models.CharField(max_length=255)
     longitude = models.FloatField()
     latitude = models.FloatField()
@@ -9,9 +15,146 @@ class DengueStat(models.Model):
     dead = models.PositiveIntegerField(default=0)
     male = models.PositiveIntegerField(default=0)
     female = models.PositiveIntegerField(default=0)
+    # Web-Mercator quadkey of the point (see planner.geo) for range-indexed spatial queries
+    quadkey = models.CharField(max_length=18, blank=True, default="", db_index=True, editable=False)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # "changes since <cursor>" scans (updated_at, id) in order
+            models.Index(fields=["updated_at", "id"], name="denguestat_updated_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.location_name} — total:{self.total}"
 
+    @property
+    def map_latlng(self):
+        return self.longitude, self.latitude
+
+    def compute_quadkey(self):
+        self.quadkey = quadkey_for(*self.map_latlng)
+        return self.quadkey
+
+    def save(self, *args, **kwargs):
+        self.compute_quadkey()
+        super().save(*args, **kwargs)
+
+
+class DailySeriesQuerySet(models.QuerySet):
+    """Shared queries for the per-(location, date) time-series tables."""
+
+    def upsert(self, objs, fields):
+        """Insert ``objs`` or, where (location, date) already exists, overwrite ``fields``."""
+        return self.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["location", "date"],
+            update_fields=[*fields, "updated_at"],
+        )
+
+    def latest_per_location(self):
+        """
+        Most recent row of every location, in one query: each row is kept if
+        its date is its location's newest, a correlated subquery answered by
+        one seek into the (location, date) unique index.
+        """
+        newest = self.filter(location=OuterRef("location")).order_by("-date").values("date")[:1]
+        return self.filter(date=Subquery(newest))
+
+
+class WeatherObservation(models.Model):
+    """Daily weather + air quality per location, as fed to the risk model."""
+    location = models.CharField(max_length=100)
+    date = models.DateField()
+    rainfall_mm = models.FloatField(null=True, blank=True)
+    humidity_percent = models.FloatField(null=True, blank=True)
+    temp_min_C = models.FloatField(null=True, blank=True)
+    temp_max_C = models.FloatField(null=True, blank=True)
+    temp_mean_C = models.FloatField(null=True, blank=True)
+    wind_speed_kph = models.FloatField(null=True, blank=True)
+    wind_direction_deg = models.FloatField(null=True, blank=True)
+    uv_index = models.FloatField(null=True, blank=True)
+    pm25 = models.FloatField(null=True, blank=True)
+    pm10 = models.FloatField(null=True, blank=True)
+    aqi = models.FloatField(null=True, blank=True)
+    # upstream sources that failed when this row was fetched (empty = complete)
+    missing_sources = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DailySeriesQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # doubles as the (location, date) composite index
+            models.UniqueConstraint(fields=["location", "date"], name="weatherobs_location_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.location} {self.date}"
+
+
+class RiskPrediction(models.Model):
+    """Daily SVM risk level per location."""
+    location = models.CharField(max_length=100)
+    date = models.DateField()
+    risk_level = models.CharField(max_length=20)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DailySeriesQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["location", "date"], name="riskpred_location_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.location} {self.date} — {self.risk_level}"
+
+
+class DailyCaseCount(models.Model):
+    """
+    New dengue cases per location and day.
+    Write through planner.services.case_windows.record_daily_cases so the
+    rolling-window summaries stay in step.
+    """
+    location = models.CharField(max_length=255)
+    date = models.DateField()
+    total = models.PositiveIntegerField()      # admitted that day
+    dead = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DailySeriesQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["location", "date"], name="dailycases_location_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.location} {self.date} — total:{self.total}"
+
+
+class CaseWindowSummary(models.Model):
+    """
+    Cases per location over a trailing window ending at ``as_of``, maintained
+    incrementally from DailyCaseCount (see planner.services.case_windows).
+    """
+    WINDOW_CHOICES = [("7d", "Last 7 days"), ("30d", "Last 30 days"), ("season", "Season to date")]
+
+    location = models.CharField(max_length=255)
+    window = models.CharField(max_length=10, choices=WINDOW_CHOICES)
+    as_of = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    dead = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["window", "location"], name="casewindow_window_location_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.location} {self.window} as of {self.as_of} — total:{self.total}"
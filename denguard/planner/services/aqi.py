@@ -0,0 +1,96 @@
+# services/aqi.py
+"""
+US-EPA AQI from PM2.5 / PM10 concentrations, computed over whole arrays.
+
+Breakpoints are found with ``np.searchsorted`` and every value is
+interpolated at once; the dominant pollutant and category are picked with
+vector ops. Results match the collector's original per-value functions
+exactly, including their quirks: a concentration that falls in a gap between
+two ranges (e.g. PM2.5 12.05) or beyond the table is extrapolated from the
+top range and capped at 500, values are rounded half-to-even, and a tie
+between the two sub-indices goes to PM10.
+"""
+import numpy as np
+
+PM25_BREAKPOINTS = [
+    (0.0, 12.0, 0, 50),
+    (12.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 150.4, 151, 200),
+    (150.5, 250.4, 201, 300),
+    (250.5, 350.4, 301, 400),
+    (350.5, 500.4, 401, 500),
+]
+
+PM10_BREAKPOINTS = [
+    (0, 54, 0, 50),
+    (55, 154, 51, 100),
+    (155, 254, 101, 150),
+    (255, 354, 151, 200),
+    (355, 424, 201, 300),
+    (425, 504, 301, 400),
+    (505, 604, 401, 500),
+]
+
+CATEGORIES = np.array([
+    "Good", "Moderate", "Unhealthy for Sensitive Groups",
+    "Unhealthy", "Very Unhealthy", "Hazardous",
+], dtype=object)
+CATEGORY_UPPER_BOUNDS = np.array([50, 100, 150, 200, 300])   # inclusive
+
+
+def _as_array(values):
+    """float64 array; None -> NaN."""
+    return np.array(values, dtype=np.float64, ndmin=1)
+
+
+def subindex(conc, breakpoints):
+    """AQI sub-index per concentration (float array of whole numbers, NaN where conc is NaN/None)."""
+    conc = _as_array(conc)
+    bp_lo, bp_hi, i_lo, i_hi = np.array(breakpoints, dtype=np.float64).T
+    top = len(bp_lo) - 1
+
+    row = np.clip(np.searchsorted(bp_lo, conc, side="right") - 1, 0, top)
+    inside = (conc >= bp_lo[row]) & (conc <= bp_hi[row])
+    row = np.where(inside, row, top)
+
+    aqi = ((i_hi[row] - i_lo[row]) / (bp_hi[row] - bp_lo[row])) * (conc - bp_lo[row]) + i_lo[row]
+    return np.rint(np.where(inside, aqi, np.minimum(aqi, 500)))
+
+
+def category(aqi):
+    """Category name per AQI value (object array, None where AQI is NaN)."""
+    aqi = _as_array(aqi)
+    names = CATEGORIES[np.searchsorted(CATEGORY_UPPER_BOUNDS, np.nan_to_num(aqi), side="left")]
+    names[np.isnan(aqi)] = None
+    return names
+
+
+def daily_aqi(pm25, pm10):
+    """
+    AQI of each day from its PM2.5 and PM10 concentrations (array-likes of
+    equal length, None/NaN = not measured). Returns a dict of arrays:
+    ``aqi`` (float, NaN if neither pollutant), ``category`` and ``dominant``
+    ("PM2.5" / "PM10" / None), plus both sub-indices.
+    """
+    s25 = subindex(pm25, PM25_BREAKPOINTS)
+    s10 = subindex(pm10, PM10_BREAKPOINTS)
+    has25, has10 = ~np.isnan(s25), ~np.isnan(s10)
+    pm25_wins = has25 & (~has10 | (s25 > s10))
+
+    dominant = np.full(len(s25), None, dtype=object)
+    dominant[has10] = "PM10"
+    dominant[pm25_wins] = "PM2.5"
+    aqi = np.where(pm25_wins, s25, s10)
+    return {
+        "aqi": aqi,
+        "category": category(aqi),
+        "dominant": dominant,
+        "pm25_subindex": s25,
+        "pm10_subindex": s10,
+    }
+
+
+def as_ints(values):
+    """Whole-number float array -> list of int / None (JSON/CSV friendly)."""
+    return [None if v is None else int(v) for v in np.where(np.isnan(values), None, values).tolist()]
@@ -0,0 +1,137 @@
+# services/case_windows.py
+"""
+Rolling-window case summaries: last 7 days, last 30 days and season to date.
+
+DailyCaseCount holds one row per (location, date); CaseWindowSummary holds one
+row per (window, location), all for a shared ``as_of`` date, so dashboards
+and alerts read O(locations) rows instead of scanning the history.
+``record_daily_cases`` keeps the summaries in step incrementally:
+
+* a written day inside a window adds its delta (new count - previous count);
+* when the newest date moves forward, only the days that drop out of each
+  window are summed (one grouped query per window) and subtracted.
+
+``rebuild_summaries`` recomputes everything from scratch (first load/repair).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from planner.models import CaseWindowSummary, DailyCaseCount
+
+SEASON_START_MONTH = 1      # DGHS counts the dengue season from January
+VALUE_FIELDS = ["total", "dead"]
+
+
+def _trailing(days):
+    return lambda as_of: as_of - timedelta(days=days - 1)
+
+
+def season_start(as_of):
+    year = as_of.year if as_of.month >= SEASON_START_MONTH else as_of.year - 1
+    return date(year, SEASON_START_MONTH, 1)
+
+
+# window -> first day it includes for a given as_of (the last day)
+WINDOWS = {"7d": _trailing(7), "30d": _trailing(30), "season": season_start}
+
+
+def _sums(start, end):
+    """{location: (total, dead)} over days start..end inclusive."""
+    rows = (
+        DailyCaseCount.objects.filter(date__gte=start, date__lte=end)
+        .values_list("location").annotate(Sum("total"), Sum("dead")).order_by()
+    )
+    return {location: (total, dead) for location, total, dead in rows}
+
+
+def rebuild_summaries(as_of=None):
+    """Recompute every summary from DailyCaseCount, ending at ``as_of`` (default: newest day)."""
+    as_of = as_of or DailyCaseCount.objects.aggregate(Max("date"))["date__max"]
+    with transaction.atomic():
+        CaseWindowSummary.objects.all().delete()
+        if as_of is None:
+            return None
+        CaseWindowSummary.objects.bulk_create(
+            CaseWindowSummary(window=window, location=location, as_of=as_of, total=total, dead=dead)
+            for window, start in WINDOWS.items()
+            for location, (total, dead) in _sums(start(as_of), as_of).items()
+        )
+    return as_of
+
+
+def record_daily_cases(counts):
+    """
+    Upsert DailyCaseCount objects (last one wins per location/date) and apply
+    the change to the window summaries. Returns the number of days written.
+    """
+    counts = {(c.location, c.date): c for c in counts}
+    if not counts:
+        return 0
+
+    with transaction.atomic():
+        summaries = {(s.window, s.location): s for s in CaseWindowSummary.objects.select_for_update()}
+        old_as_of = max((s.as_of for s in summaries.values()), default=None)
+        if old_as_of is None:
+            DailyCaseCount.objects.upsert(list(counts.values()), VALUE_FIELDS)
+            rebuild_summaries()
+            return len(counts)
+
+        new_as_of = max(old_as_of, max(day for _, day in counts))
+        deltas = defaultdict(lambda: [0, 0])
+
+        # Days leaving each window as as_of advances (their pre-upsert values)
+        if new_as_of > old_as_of:
+            for window, start in WINDOWS.items():
+                old_start, new_start = start(old_as_of), start(new_as_of)
+                if new_start > old_start:
+                    for location, (total, dead) in _sums(old_start, new_start - timedelta(days=1)).items():
+                        deltas[window, location][0] -= total
+                        deltas[window, location][1] -= dead
+
+        previous = {
+            (location, day): (total, dead)
+            for location, day, total, dead in DailyCaseCount.objects.filter(
+                location__in={location for location, _ in counts},
+                date__in={day for _, day in counts},
+            ).values_list("location", "date", "total", "dead")
+        }
+        for (location, day), count in counts.items():
+            old_total, old_dead = previous.get((location, day), (0, 0))
+            for window, start in WINDOWS.items():
+                if start(new_as_of) <= day <= new_as_of:
+                    deltas[window, location][0] += count.total - old_total
+                    deltas[window, location][1] += count.dead - old_dead
+
+        DailyCaseCount.objects.upsert(list(counts.values()), VALUE_FIELDS)
+
+        now = timezone.now()
+        if new_as_of > old_as_of:
+            CaseWindowSummary.objects.update(as_of=new_as_of, updated_at=now)
+        changed, created = [], []
+        for key, (total, dead) in deltas.items():
+            if not (total or dead):
+                continue
+            summary = summaries.get(key)
+            if summary is None:
+                summary = CaseWindowSummary(window=key[0], location=key[1])
+                created.append(summary)
+            else:
+                changed.append(summary)
+            summary.total += total
+            summary.dead += dead
+            summary.as_of, summary.updated_at = new_as_of, now
+        CaseWindowSummary.objects.bulk_update(changed, [*VALUE_FIELDS, "as_of", "updated_at"])
+        CaseWindowSummary.objects.bulk_create(created)
+    return len(counts)
+
+
+def window_summary(window):
+    """(as_of, rows) for one window; rows are {location, total, dead}, most cases first."""
+    summaries = CaseWindowSummary.objects.filter(window=window)
+    as_of = summaries.aggregate(Max("as_of"))["as_of__max"]
+    rows = summaries.exclude(total=0, dead=0).order_by("-total", "location").values("location", "total", "dead")
+    return as_of, list(rows)
@@ -0,0 +1,58 @@
+# services/dashboard.py
+"""
+Chart data for the home dashboard, aggregated in the database from
+DengueStat and cached as ready-to-embed JSON strings until the case data
+changes (see services.dengue_cache).
+"""
+import json
+
+from django.db.models import Avg, Sum
+
+from planner.models import DengueStat
+from planner.services.dengue_cache import get_or_build
+
+
+def _build_case_summary():
+    # Aggregate total/male/female/dead by location
+    rows = list(
+        DengueStat.objects.values("location_name")
+        .annotate(
+            total_sum=Sum("total"),
+            male_sum=Sum("male"),
+            female_sum=Sum("female"),
+            dead_sum=Sum("dead"),
+            latitude_avg=Avg("latitude"),
+            longitude_avg=Avg("longitude"),
+        )
+        .order_by("location_name")
+    )
+    locations = [r["location_name"] for r in rows]
+    total_cases = [r["total_sum"] for r in rows]
+    male_cases = [r["male_sum"] for r in rows]
+    female_cases = [r["female_sum"] for r in rows]
+    dead_cases = [r["dead_sum"] for r in rows]
+
+    # Gender distribution overall
+    gender_distribution = [sum(male_cases), sum(female_cases)]
+
+    # Bubble/Scatter chart data
+    latitudes = [r["latitude_avg"] for r in rows]
+    longitudes = [r["longitude_avg"] for r in rows]
+    bubble_sizes = [x / 10 for x in total_cases]  # scale down for visibility
+
+    return {
+        'locations_json': json.dumps(locations),
+        'total_cases_json': json.dumps(total_cases),
+        'male_cases_json': json.dumps(male_cases),
+        'female_cases_json': json.dumps(female_cases),
+        'dead_cases_json': json.dumps(dead_cases),
+        'gender_distribution_json': json.dumps(gender_distribution),
+        'latitudes_json': json.dumps(latitudes),
+        'longitudes_json': json.dumps(longitudes),
+        'bubble_sizes_json': json.dumps(bubble_sizes),
+    }
+
+
+def case_summary_context():
+    """Template context entries (pre-serialized JSON) for the home charts."""
+    return get_or_build("case-summary", _build_case_summary)
@@ -0,0 +1,197 @@
+# services/datasets.py
+"""
+Reading and writing the daily weather / risk datasets.
+
+A path ending in ``.csv`` is a plain CSV file (read and written exactly as
+before). Any other path is a directory holding a columnar dataset --
+Parquet (default) or Feather/Arrow IPC -- partitioned by location and year
+(``location=Delhi/year=2024/part-0.parquet``). Columnar datasets store
+floats as float32 and repetitive text columns (location, risk level, AQI
+category) as dictionary-encoded categories, so loading multi-city,
+multi-year data reads a fraction of the bytes; reads can be pruned to some
+columns / locations / years and are memory-mapped.
+
+The columnar formats need ``pyarrow`` (pinned in requirements.txt); CSV
+paths work without it.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PARTITION_COLUMNS = ["location", "year"]
+CATEGORY_COLUMNS = ["location", "risk", "aqi_category", "aqi_dominant_pollutant"]
+FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.fs as pafs
+    except ImportError:
+        raise ImportError(
+            "Parquet/Feather datasets need pyarrow (pip install pyarrow); use a .csv path instead"
+        ) from None
+    return pa, ds, pafs
+
+
+def is_csv(path):
+    return Path(path).suffix.lower() == ".csv"
+
+
+def check_supported(path):
+    """Raise ImportError up front if ``path`` is a columnar dataset and pyarrow is missing."""
+    if not is_csv(path):
+        _arrow()
+
+
+def compact_dtypes(df):
+    """float64 -> float32 and repetitive text columns -> category (training/scoring upcast as needed)."""
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == np.float64:
+            df[column] = df[column].astype(np.float32)
+        elif column in CATEGORY_COLUMNS and df[column].dtype == object:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def _dataset_format(path):
+    """'parquet' or 'feather' for an existing dataset directory (None if empty/missing)."""
+    for name, suffix in FORMATS.items():
+        if next(Path(path).rglob(f"*{suffix}"), None) is not None:
+            return name
+    return None
+
+
+def _open(path, memory_map=True):
+    _, ds, pafs = _arrow()
+    fmt = _dataset_format(path)
+    if fmt is None:
+        raise FileNotFoundError(f"no dataset files under {path}")
+    return ds.dataset(
+        str(path),
+        format="ipc" if fmt == "feather" else fmt,
+        partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+        filesystem=pafs.LocalFileSystem(use_mmap=memory_map),
+    )
+
+
+def load(path, columns=None, locations=None, years=None, memory_map=True):
+    """
+    DataFrame from a CSV file or columnar dataset directory.
+    ``columns`` prunes what is read; ``locations`` / ``years`` only read the
+    matching partitions of a columnar dataset (CSV rows are filtered after
+    reading).
+    """
+    if is_csv(path):
+        filters = _filter_columns(path, pd.read_csv(path, nrows=0).columns, locations, years, "date")
+        usecols = None if columns is None else list(columns) + [c for c in filters if c not in columns]
+        df = pd.read_csv(path, usecols=usecols, float_precision="round_trip")
+        if locations is not None:
+            df = df[df["location"].isin(locations)]
+        if years is not None:
+            df = df[df["date"].astype(str).str[:4].astype(int).isin(years)]
+        if columns is not None:
+            df = df[list(columns)]
+        return df.reset_index(drop=True)
+
+    _, ds, _ = _arrow()
+    dataset = _open(path, memory_map)
+    _filter_columns(path, dataset.schema.names, locations, years, "year")
+    condition = None
+    if locations is not None:
+        condition = ds.field("location").isin(list(locations))
+    if years is not None:
+        in_years = ds.field("year").isin([int(y) for y in years])
+        condition = in_years if condition is None else condition & in_years
+    df = dataset.to_table(columns=columns, filter=condition).to_pandas()
+    if columns is None:
+        # partition columns come back last; restore the order they were written in
+        written = [c["name"] for c in (dataset.schema.pandas_metadata or {}).get("columns", [])]
+        order = [c for c in written if c in df.columns] + [c for c in df.columns if c not in written]
+        df = df[[c for c in order if c != "year"]]
+    elif "year" not in columns:
+        df = df.drop(columns="year", errors="ignore")
+    if {"location", "date"} <= set(df.columns):
+        df = df.sort_values(["location", "date"], key=lambda col: col.astype(str)).reset_index(drop=True)
+    return df
+
+
+def _filter_columns(path, names, locations, years, year_column):
+    """Columns the ``locations`` / ``years`` filters need; ValueError naming any ``path`` lacks."""
+    needed = (["location"] if locations is not None else []) + ([year_column] if years is not None else [])
+    missing = [c for c in needed if c not in names]
+    if missing:
+        raise ValueError(f"'{path}' is missing the column(s) to filter on: {', '.join(missing)}")
+    return needed
+
+
+def _plain(df):
+    """Categories back to object columns so frames from different sources concatenate cleanly."""
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def save(df, path, format="parquet"):
+    """
+    Write ``df`` as CSV (``.csv`` path) or as a partitioned columnar dataset.
+    Dataset partitions present in ``df`` are replaced; others are kept.
+    """
+    if is_csv(path):
+        _write_csv(df, path)
+        return
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+    pa, ds, _ = _arrow()
+    df = compact_dtypes(df)
+    df["year"] = df["date"].astype(str).str[:4].astype(np.int16)
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        str(path),
+        format="ipc" if format == "feather" else format,
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor="hive",
+        basename_template="part-{i}" + FORMATS[format],
+        existing_data_behavior="delete_matching",
+    )
+
+
+def _write_csv(df, path):
+    """Atomic CSV write (readers never see a half-written file)."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.resolve().parent, suffix=".tmp")
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as fh:
+        df.to_csv(fh, index=False)
+    os.replace(tmp, path)
+
+
+def upsert(path, rows, keys=("location", "date")):
+    """
+    Merge ``rows`` (DataFrame or list of dicts) into the dataset at ``path``,
+    replacing rows with the same ``keys``; locations keep their order and
+    days stay ascending. Only the partitions the new rows fall in are read
+    and rewritten. Returns the number of rows in the rewritten file or
+    partitions.
+    """
+    new = pd.DataFrame(rows)
+    keys = list(keys)
+    if is_csv(path):
+        old = load(path) if Path(path).exists() else new.iloc[0:0]
+    else:
+        fmt = _dataset_format(path)
+        years = new["date"].astype(str).str[:4].astype(int).unique().tolist()
+        old = load(path, locations=new["location"].unique().tolist(), years=years) if fmt else new.iloc[0:0]
+
+    df = pd.concat([_plain(old), new], ignore_index=True).drop_duplicates(keys, keep="last")
+    location_order = {name: i for i, name in enumerate(df["location"].drop_duplicates())}
+    df = df.sort_values(["location", "date"], key=lambda col: col.map(location_order) if col.name == "location" else col)
+
+    if is_csv(path):
+        _write_csv(df, path)
+    else:
+        save(df, path, format=fmt or "parquet")
+    return len(df)
@@ -0,0 +1,43 @@
+# services/dengue_cache.py
+"""
+Cache versioning for everything derived from DengueStat.
+
+Derived payloads (dashboard aggregates, heatmap responses, ...) are cached
+under keys that embed the current data version. Any change to DengueStat --
+via model signals, or explicitly after bulk operations that bypass them --
+bumps the version, so stale entries are simply never read again and expire
+on their own.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = "dengue:data-version"
+DERIVED_TIMEOUT = 24 * 60 * 60
+
+
+def data_version():
+    """Current version (nanosecond timestamp of the last change)."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def versioned_key(name):
+    return f"dengue:{name}:{data_version()}"
+
+
+def get_or_build(name, build):
+    """Return the cached value for ``name`` at the current version, building it on a miss."""
+    key = versioned_key(name)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout=DERIVED_TIMEOUT)
+    return value
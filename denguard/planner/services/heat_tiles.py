@@ -0,0 +1,193 @@
+# services/heat_tiles.py
+"""
+Pre-rendered heatmap raster tiles (/tiles/heatmap/{z}/{x}/{y}.png).
+
+Each tile is a kernel-density estimate of DengueStat.total: the points of the
+tile and a margin around it are binned into a weighted pixel histogram with
+NumPy and smoothed with a separable Gaussian (two matrix products), then
+mapped through a fixed log colour scale. Because the scale is absolute (not
+relative to the densest point on screen), a data change only affects the
+tiles within the kernel radius of that point -- those files are deleted and
+re-rendered on the next request; every other tile stays valid on disk.
+"""
+import io
+import math
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from planner.geo import MAX_LATITUDE, QUADKEY_LEVEL, quadkey_range, tile_to_quadkey
+from planner.models import DengueStat
+from planner.services.dengue_cache import data_version
+
+TILE_SIZE = 256
+MAX_TILE_ZOOM = QUADKEY_LEVEL
+KERNEL_SIGMA_PX = 10
+MARGIN_PX = 3 * KERNEL_SIGMA_PX
+SATURATION_CASES = 10000     # smoothed cases per pixel rendered at full colour
+
+# blue -> cyan -> lime -> yellow -> red, like leaflet.heat's default gradient
+_GRADIENT_STOPS = [(0.0, (0, 0, 255)), (0.4, (0, 0, 255)), (0.6, (0, 255, 255)),
+                   (0.7, (0, 255, 0)), (0.8, (255, 255, 0)), (1.0, (255, 0, 0))]
+
+
+def _build_palette():
+    t = np.linspace(0.0, 1.0, 256)
+    stops = np.array([s for s, _ in _GRADIENT_STOPS])
+    colours = np.array([c for _, c in _GRADIENT_STOPS], dtype=float)
+    rgb = np.stack([np.interp(t, stops, colours[:, i]) for i in range(3)], axis=1)
+    alpha = np.clip(t * 1.6, 0.0, 0.85) * 255
+    return np.column_stack([rgb, alpha]).round().astype(np.uint8)
+
+
+_PALETTE = _build_palette()
+
+
+def _kernel_matrix(n):
+    """(n, n) Gaussian smoothing operator; K @ H @ K.T blurs H along both axes."""
+    idx = np.arange(n)
+    return np.exp(-((idx[:, None] - idx[None, :]) ** 2) / (2.0 * KERNEL_SIGMA_PX ** 2))
+
+
+_KERNEL = _kernel_matrix(TILE_SIZE + 2 * MARGIN_PX)
+
+
+def tile_dir():
+    return Path(getattr(settings, "HEATMAP_TILE_DIR", Path(settings.BASE_DIR) / "cache" / "tiles"))
+
+
+def tile_path(z, x, y):
+    return tile_dir() / str(z) / str(x) / f"{y}.png"
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+
+def project(lat, lng, z):
+    """Global pixel coordinates at zoom ``z`` for arrays of lat/lng."""
+    world = TILE_SIZE * (1 << z)
+    lat = np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE)
+    sin_lat = np.sin(np.radians(lat))
+    px = (lng + 180.0) / 360.0 * world
+    py = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * world
+    return px, py
+
+
+def _points_near(z, x, y):
+    """(lat, lng, total) arrays for the tile and its 8 neighbours (covers the margin)."""
+    n = 1 << z
+    near = Q()
+    for nx in range(max(x - 1, 0), min(x + 1, n - 1) + 1):
+        for ny in range(max(y - 1, 0), min(y + 1, n - 1) + 1):
+            low, high = quadkey_range(tile_to_quadkey(nx, ny, z))
+            near |= Q(quadkey__gte=low, quadkey__lt=high)
+    # `longitude` holds the map latitude (see DengueStat)
+    rows = np.array(
+        DengueStat.objects.filter(near).values_list("longitude", "latitude", "total"),
+        dtype=np.float64,
+    ).reshape(-1, 3)
+    return rows[:, 0], rows[:, 1], rows[:, 2]
+
+
+def render_tile(z, x, y, points=None):
+    """PNG bytes for tile z/x/y. ``points`` = (lat, lng, total) arrays, queried if omitted."""
+    lat, lng, total = points if points is not None else _points_near(z, x, y)
+    size = TILE_SIZE + 2 * MARGIN_PX
+
+    px, py = project(lat, lng, z)
+    px = px - x * TILE_SIZE + MARGIN_PX
+    py = py - y * TILE_SIZE + MARGIN_PX
+    inside = (px >= 0) & (px < size) & (py >= 0) & (py < size)
+
+    hist, _, _ = np.histogram2d(py[inside], px[inside], bins=size, range=[[0, size], [0, size]], weights=total[inside])
+    density = (_KERNEL @ hist @ _KERNEL.T)[MARGIN_PX:-MARGIN_PX, MARGIN_PX:-MARGIN_PX]
+
+    level = np.clip(np.log1p(density) / math.log1p(SATURATION_CASES), 0.0, 1.0)
+    rgba = _PALETTE[(level * 255).astype(np.uint8)]
+    rgba[density < 0.5, 3] = 0   # fully transparent where (practically) no cases
+
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def write_tile(z, x, y, data, version=None):
+    """
+    Atomically write tile bytes (readers never see a partial file). With
+    ``version``, the file is only swapped in if the DengueStat data version
+    is still the one the tile was rendered at; returns None otherwise.
+    """
+    path = tile_path(z, x, y)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    if version is not None and data_version() != version:
+        os.unlink(tmp)
+        return None
+    os.replace(tmp, path)
+    return path
+
+
+def get_tile(z, x, y):
+    """
+    PNG bytes of tile z/x/y: read from disk, or rendered (and cached) if it
+    isn't there -- including when an invalidation removes it between the
+    check and the read. A render that an invalidation overtakes is served
+    but not cached, so it cannot overwrite the invalidation.
+    """
+    try:
+        return tile_path(z, x, y).read_bytes()
+    except FileNotFoundError:
+        version = data_version()
+        data = render_tile(z, x, y)
+        write_tile(z, x, y, data, version=version)
+        return data
+
+
+def tiles_near(lat, lng, z):
+    """
+    (k, 2) array of the distinct (x, y) tiles at zoom ``z`` whose rendering
+    includes any of the points in the ``lat`` / ``lng`` arrays (projected
+    once, tile and kernel margin computed for all points together).
+    """
+    n = 1 << z
+    px, py = project(np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64), z)
+    corners = [
+        np.column_stack([(px + dx) // TILE_SIZE, (py + dy) // TILE_SIZE])
+        for dx in (-MARGIN_PX, MARGIN_PX) for dy in (-MARGIN_PX, MARGIN_PX)
+    ]
+    tiles = np.concatenate(corners).astype(np.int64)
+    tiles = tiles[((tiles >= 0) & (tiles < n)).all(axis=1)]
+    return np.unique(tiles, axis=0)
+
+
+def affected_tiles(lat, lng, max_zoom=MAX_TILE_ZOOM):
+    """Every (z, x, y) whose rendering includes a point at (lat, lng)."""
+    return [
+        (z, int(x), int(y))
+        for z in range(max_zoom + 1)
+        for x, y in tiles_near([lat], [lng], z)
+    ]
+
+
+def invalidate_point(lat, lng):
+    """Delete the cached tiles a change at (lat, lng) affects."""
+    for z, x, y in affected_tiles(lat, lng):
+        try:
+            os.remove(tile_path(z, x, y))
+        except FileNotFoundError:
+            pass
+
+
+def invalidate_all():
+    """Drop every cached tile (after bulk changes touching many points)."""
+    shutil.rmtree(tile_dir(), ignore_errors=True)
@@ -0,0 +1,284 @@
+# services/heatmap.py
+"""
+Heatmap point payloads, built with one projected query and cached as
+encoded bytes (plain and gzip) per DengueStat data version.
+
+With a viewport (``bbox`` + ``zoom``) the points are clustered server-side:
+the viewport is snapped outward to a handful of quadkey tiles, only rows in
+those tiles' index ranges are read, and they are summed into grid cells a
+few levels below the zoom, so the payload size depends on the screen, not on
+the number of case records.
+
+Besides JSON (the default) payloads can be encoded as columnar little-endian
+typed arrays (``format=f32`` or the quantized ``format=q16``), which the
+browser maps straight onto Float32Array/Uint16Array views.
+"""
+import gzip
+import hashlib
+import json
+import math
+import struct
+
+import numpy as np
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Avg, Max, Min, Q, Sum, Window
+from django.db.models.functions import Substr
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+
+from planner.geo import QUADKEY_LEVEL, quadkey_range, tile_to_quadkey, tiles_covering
+from planner.models import DengueStat
+from planner.services.dengue_cache import data_version, get_or_build
+
+CLUSTER_EXTRA_LEVELS = 3   # grid cells of ~32 px at the requested zoom
+MAX_COVER_TILES = 16       # index ranges scanned per viewport
+MAX_ZOOM = 20
+CHANGES_LIMIT = 5000       # default page size of ?since= responses
+MAX_CHANGES_LIMIT = 50000
+
+# Binary layout (all little-endian):
+#   header  48 bytes: magic "DGHM", uint32 count, uint32 format (1=f32, 2=q16),
+#           uint32 max_total, float32 extent[4] (south, west, north, east; NaN if
+#           unknown), float32 quantization bounds[4] (lat0, lat1, lng0, lng1)
+#   f32     float32 lat[count], float32 lng[count], float32 intensity[count]
+#   q16     uint16 lat[count], uint16 lng[count], uint16 intensity[count], each
+#           scaled to 0..65535 over its bounds (intensity over 0..1)
+FORMATS = ("json", "f32", "q16")
+BINARY_HEADER = struct.Struct("<4sIII4f4f")
+_BINARY_FORMAT_IDS = {"f32": 1, "q16": 2}
+_Q16_MAX = 65535
+
+
+def _encode_binary(obj, fmt):
+    points = np.asarray(obj["points"], dtype=np.float64).reshape(-1, 3)
+    lat, lng, intensity = points[:, 0], points[:, 1], points[:, 2]
+
+    extent = obj.get("extent")
+    if extent is None and len(points):
+        extent = [[lat.min(), lng.min()], [lat.max(), lng.max()]]
+    extent = [*extent[0], *extent[1]] if extent else [float("nan")] * 4
+
+    if fmt == "f32":
+        bounds = [0.0] * 4
+        columns = [c.astype("<f4") for c in (lat, lng, intensity)]
+    else:
+        lat0, lat1 = (lat.min(), lat.max()) if len(points) else (0.0, 0.0)
+        lng0, lng1 = (lng.min(), lng.max()) if len(points) else (0.0, 0.0)
+        bounds = [lat0, lat1, lng0, lng1]
+
+        def quantize(values, lo, hi):
+            scale = _Q16_MAX / (hi - lo) if hi > lo else 0.0
+            return np.rint((values - lo) * scale).astype("<u2")
+
+        columns = [quantize(lat, lat0, lat1), quantize(lng, lng0, lng1), quantize(intensity, 0.0, 1.0)]
+
+    header = BINARY_HEADER.pack(b"DGHM", len(points), _BINARY_FORMAT_IDS[fmt], int(obj["max_total"]), *extent, *bounds)
+    return header + b"".join(c.tobytes() for c in columns)
+
+
+def _encoded(obj, fmt="json"):
+    if fmt == "json":
+        body, content_type = json.dumps(obj, separators=(",", ":")).encode(), "application/json"
+    else:
+        body, content_type = _encode_binary(obj, fmt), "application/octet-stream"
+    return {"body": body, "gzip": gzip.compress(body, compresslevel=6), "content_type": content_type}
+
+
+def _build_points(fmt):
+    # Only the three columns needed, with the overall max computed in the same query
+    rows = list(
+        DengueStat.objects
+        .annotate(max_total=Window(Max("total")))
+        .values_list("longitude", "latitude", "total", "max_total")
+    )
+    max_total = (rows[0][3] if rows else None) or 1
+    return _encoded({
+        "points": [[lon, lat, round(total / max_total, 3)] for lon, lat, total, _ in rows],  # normalize 0..1
+        "max_total": max_total,
+    }, fmt)
+
+
+def points_payload(fmt="json"):
+    return get_or_build(f"heatmap-points:{fmt}", lambda: _build_points(fmt))
+
+
+def _extent():
+    """[[south, west], [north, east]] of all points in map coordinates, or None."""
+    e = DengueStat.objects.aggregate(
+        south=Min("longitude"), north=Max("longitude"), west=Min("latitude"), east=Max("latitude"),
+    )
+    return None if e["south"] is None else [[e["south"], e["west"]], [e["north"], e["east"]]]
+
+
+def parse_viewport(params):
+    """
+    (bbox, zoom) from ``bbox=west,south,east,north`` (Leaflet's toBBoxString)
+    and ``zoom``; None when no bbox was given. Raises ValueError if malformed.
+
+    Leaflet reports longitudes past +/-180 when the map is panned across the
+    antimeridian or zoomed out beyond one world; they are wrapped back into
+    range, so the returned west is greater than east when the viewport
+    crosses the antimeridian. Latitudes are clamped to +/-90.
+    """
+    if not params.get("bbox"):
+        return None
+    west, south, east, north = (float(v) for v in params["bbox"].split(","))
+    if not (all(map(math.isfinite, (west, south, east, north))) and west <= east and south <= north):
+        raise ValueError("bbox must be west,south,east,north in degrees")
+    south, north = (min(max(v, -90.0), 90.0) for v in (south, north))
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        shift = math.floor((west + 180) / 360) * 360
+        west, east = west - shift, east - shift
+        if east > 180:
+            east -= 360
+    zoom = min(max(int(params.get("zoom", 10)), 0), MAX_ZOOM)
+    return (west, south, east, north), zoom
+
+
+def _split_antimeridian(bbox):
+    """``bbox`` as one or two boxes that don't cross the antimeridian."""
+    west, south, east, north = bbox
+    if west <= east:
+        return [bbox]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def cover_prefixes(bbox, zoom):
+    """Quadkeys of the (at most MAX_COVER_TILES) tiles covering ``bbox`` at about ``zoom``."""
+    def covering(level):
+        return {tile for part in _split_antimeridian(bbox) for tile in tiles_covering(*part, level)}
+
+    level = min(max(zoom - 2, 0), QUADKEY_LEVEL)
+    tiles = covering(level)
+    while len(tiles) > MAX_COVER_TILES and level > 0:
+        level -= 1
+        tiles = covering(level)
+    return sorted(tile_to_quadkey(x, y, level) for x, y in tiles)
+
+
+def _build_cells(prefixes, cell_level, fmt):
+    in_tiles = Q()
+    for prefix in prefixes:
+        low, high = quadkey_range(prefix)
+        in_tiles |= Q(quadkey__gte=low, quadkey__lt=high)
+
+    cells = list(
+        DengueStat.objects.filter(in_tiles)
+        .annotate(cell=Substr("quadkey", 1, cell_level))
+        .values("cell")
+        .annotate(lat=Avg("longitude"), lng=Avg("latitude"), cell_total=Sum("total"))
+        .values_list("lat", "lng", "cell_total")
+        .order_by()
+    )
+    max_total = max((total for _, _, total in cells), default=0) or 1
+    return _encoded({
+        "points": [[lat, lng, round(total / max_total, 3)] for lat, lng, total in cells],
+        "max_total": max_total,
+        "cell_level": cell_level,
+        "extent": get_or_build("heatmap-extent", _extent),
+    }, fmt)
+
+
+def cells_payload(bbox, zoom, fmt="json"):
+    """Clustered payload for the viewport; cached per covering tile set and cell size."""
+    prefixes = cover_prefixes(bbox, zoom)
+    cell_level = min(zoom + CLUSTER_EXTRA_LEVELS, QUADKEY_LEVEL)
+    digest = hashlib.md5(",".join(prefixes).encode()).hexdigest()
+    return get_or_build(
+        f"heatmap-cells:{fmt}:{cell_level}:{digest}",
+        lambda: _build_cells(prefixes, cell_level, fmt),
+    )
+
+
+def _max_total():
+    return DengueStat.objects.aggregate(m=Max("total"))["m"] or 1
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(updated_at, pk):
+    micros = (updated_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{pk}"
+
+
+def parse_since(value):
+    """
+    (updated_at, id) position from a cursor returned by a previous call, or
+    from a plain ISO-8601 timestamp. Raises ValueError if neither.
+    """
+    micros, sep, pk = value.partition("-")
+    if sep and micros.isdigit() and pk.isdigit():
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    moment = parse_datetime(value.replace(" ", "+"))   # '+' arrives as ' ' when not URL-encoded
+    if moment is None:
+        raise ValueError("since must be a cursor or an ISO-8601 timestamp")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment, 0
+
+
+def changes_since(since, limit=CHANGES_LIMIT):
+    """
+    Points added or changed after ``since`` (see parse_since), oldest first,
+    as a JSON-ready dict with the cursor to pass next time. Uses the
+    (updated_at, id) index. Deleted rows are not reported.
+    """
+    moment, pk = since
+    rows = list(
+        DengueStat.objects
+        .filter(Q(updated_at__gt=moment) | Q(updated_at=moment, id__gt=pk))
+        .order_by("updated_at", "id")
+        .values_list("id", "longitude", "latitude", "total", "updated_at")[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    max_total = get_or_build("max-total", _max_total)
+    if rows:
+        cursor = encode_cursor(rows[-1][4], rows[-1][0])
+    else:
+        cursor = encode_cursor(moment, pk)
+    return {
+        "ids": [r[0] for r in rows],
+        "points": [[lat, lng, round(total / max_total, 3)] for _, lat, lng, total, _ in rows],
+        "max_total": max_total,
+        "cursor": cursor,
+        "has_more": has_more,
+    }
+
+
+def accepts_gzip(request):
+    return "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+
+def etag(request, *args, **kwargs):
+    query = hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:12]
+    return f'"heatmap-{data_version()}-{query}"'
+
+
+def encoded_etag(request, *args, **kwargs):
+    """ETag for encoded_response; the gzip body is a different representation."""
+    tag = etag(request)
+    return tag[:-1] + '-gz"' if accepts_gzip(request) else tag
+
+
+def last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(data_version() / 1e9, tz=timezone.utc)
+
+
+def encoded_response(request, payload):
+    """Serve a cached payload, gzip-encoded when the client accepts it."""
+    if accepts_gzip(request):
+        response = HttpResponse(payload["gzip"], content_type=payload["content_type"])
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(payload["body"], content_type=payload["content_type"])
+    patch_vary_headers(response, ("Accept-Encoding",))
+    # always revalidate; repeat loads become cheap 304s
+    response["Cache-Control"] = "no-cache"
+    return response
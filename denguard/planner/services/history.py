@@ -0,0 +1,465 @@
+# services/history.py
+"""
+Historical weather + air-quality collection for the risk model's training set
+(Open-Meteo archive, Open-Meteo air quality, NASA POWER).
+
+The work is split into units -- one (location, source, date chunk) each --
+which the ``collect_weather_history`` command fetches concurrently. Every
+finished unit is checkpointed as a JSON file, so a failed or interrupted run
+is resumed by running it again: only the units without a checkpoint are
+fetched. Per location the chunks are then merged and turned into one row per
+day, in the same shape the old "Data collector from API" script produced.
+"""
+import json
+import os
+import tempfile
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from planner.services import aqi, datasets, upstream
+from planner.services.tomorrow import CITY_COORDS
+
+# -------------------------
+# CONFIGURATION (defaults of the collect_weather_history command)
+# -------------------------
+LOCATIONS = [
+    {"name": "Delhi", "lat": 28.6139, "lon": 77.2090},
+    {"name": "Mumbai", "lat": 19.0760, "lon": 72.8777},
+]
+
+START_DATE = "2022-08-14"
+END_DATE = "2025-07-19"
+TIMEZONE = "Asia/Kolkata"
+
+# Minimum number of observed hourly values in local day to accept daily mean (e.g. 18 -> 75%)
+MIN_HOURLY_FOR_DAILY = 18
+
+# Output filename
+OUTPUT_CSV = "combined_dengue_data_openmeteo.csv"
+
+# Days per request; long ranges are split so units are small, parallel and resumable
+CHUNK_DAYS = 365
+
+# The newest archive / NASA POWER days are provisional and filled in later, so
+# incremental runs re-fetch (and replace) this many already-collected days
+INCREMENTAL_OVERLAP_DAYS = 5
+# ... and requests ending before that horizon are answered from the response cache forever
+IMMUTABLE_AFTER_DAYS = INCREMENTAL_OVERLAP_DAYS
+
+SOURCES = ("archive", "air_quality", "nasa_power")
+
+_session = upstream.new_session(user_agent="denguard-collector/1.0")
+
+Unit = namedtuple("Unit", "location lat lon source start end")
+
+
+def resolve_locations(names=None):
+    """LOCATIONS entries for ``names`` (also accepting any CITY_COORDS city); "all" = both lists."""
+    known = {loc["name"].lower(): loc for loc in LOCATIONS}
+    for city, (lat, lon) in CITY_COORDS.items():
+        known.setdefault(city.lower(), {"name": city, "lat": lat, "lon": lon})
+    if not names:
+        return list(LOCATIONS)
+    if [n.lower() for n in names] == ["all"]:
+        return list(known.values())
+    missing = [n for n in names if n.lower() not in known]
+    if missing:
+        raise ValueError(f"unknown location(s): {', '.join(missing)}")
+    return [known[n.lower()] for n in names]
+
+
+def date_chunks(start_date, end_date, days=CHUNK_DAYS):
+    """[(start, end), ...] ISO date pairs covering start..end inclusive, ``days`` at a time."""
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    chunks = []
+    while start <= end:
+        stop = min(start + timedelta(days=days - 1), end)
+        chunks.append((start.isoformat(), stop.isoformat()))
+        start = stop + timedelta(days=1)
+    return chunks
+
+
+def plan_units(locations, start_date, end_date, chunk_days=CHUNK_DAYS, sources=SOURCES):
+    return [
+        Unit(loc["name"], loc["lat"], loc["lon"], source, start, end)
+        for loc in locations
+        for source in sources
+        for start, end in date_chunks(start_date, end_date, chunk_days)
+    ]
+
+
+def last_collected_dates(path):
+    """{location: last ISO date} found in an existing output dataset ({} if there is none)."""
+    try:
+        df = datasets.load(path, columns=["location", "date"])
+    except FileNotFoundError:
+        return {}
+    return df.astype(str).groupby("location")["date"].max().to_dict()
+
+
+def plan_incremental_units(locations, last_dates, start_date, end_date, chunk_days=CHUNK_DAYS):
+    """
+    Units covering only what each location is missing: from a few days before
+    its last collected date (or ``start_date`` if it has none) to ``end_date``.
+    """
+    units = []
+    for loc in locations:
+        start = start_date
+        if loc["name"] in last_dates:
+            last = date.fromisoformat(last_dates[loc["name"]])
+            start = max(start_date, (last - timedelta(days=INCREMENTAL_OVERLAP_DAYS - 1)).isoformat())
+        units += plan_units([loc], start, end_date, chunk_days)
+    return units
+
+
+def is_immutable(end_date):
+    """True once every day up to ``end_date`` is settled upstream."""
+    return date.fromisoformat(end_date) < date.today() - timedelta(days=IMMUTABLE_AFTER_DAYS)
+
+
+def _get_json(url, params, end_date, session=None, cache=None):
+    """upstream.get_json, through the on-disk ResponseCache when one is given."""
+    session = session or _session
+    if cache is None:
+        return upstream.get_json(url, params=params, timeout=30, session=session)
+    return cache.get_json(url, params=params, immutable=is_immutable(end_date), timeout=30, session=session)
+
+
+# -------------------------
+# HELPERS: Open-Meteo weather archive (daily) & air-quality (hourly)
+# -------------------------
+def fetch_open_meteo_daily(lat, lon, start_date, end_date, timezone=TIMEZONE, session=None, cache=None):
+    """Return Open-Meteo daily archive fields dict (same shape as earlier)."""
+    url = "https://archive-api.open-meteo.com/v1/archive"
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "daily": ",".join([
+            "temperature_2m_max",
+            "temperature_2m_min",
+            "temperature_2m_mean",
+            "precipitation_sum",
+            "windspeed_10m_max",
+            "winddirection_10m_dominant",
+            "shortwave_radiation_sum"
+        ]),
+        "timezone": timezone
+    }
+    return _get_json(url, params, end_date, session, cache).get("daily", {})
+
+
+def fetch_open_meteo_pm_hourly(lat, lon, start_date, end_date, timezone=TIMEZONE, session=None, cache=None):
+    """
+    Use Open-Meteo air-quality endpoint to fetch hourly pm2_5 and pm10 for the given date range.
+    Returns (times, pm25_list, pm10_list) where times are ISO strings in requested timezone.
+    """
+    url = "https://air-quality-api.open-meteo.com/v1/air-quality"
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": "pm2_5,pm10",
+        "timezone": timezone
+    }
+    j = _get_json(url, params, end_date, session, cache)
+    hourly = j.get("hourly", {})
+    return hourly.get("time", []), hourly.get("pm2_5", []), hourly.get("pm10", [])
+
+
+# -------------------------
+# NASA POWER helper (humidity & UV)
+# -------------------------
+def fetch_nasa_power(lat, lon, start_date, end_date, session=None, cache=None):
+    url = "https://power.larc.nasa.gov/api/temporal/daily/point"
+    params = {
+        "start": start_date.replace("-", ""),
+        "end": end_date.replace("-", ""),
+        "latitude": lat,
+        "longitude": lon,
+        "community": "AG",
+        "parameters": "RH2M,ALLSKY_SFC_UVB",
+        "format": "JSON",
+        "time-standard": "UTC"
+    }
+    payload = _get_json(url, params, end_date, session, cache).get("properties", {}).get("parameter", {})
+
+    def convert(param_dict):
+        out = {}
+        for k, v in (param_dict or {}).items():
+            try:
+                d = datetime.strptime(k, "%Y%m%d").strftime("%Y-%m-%d")
+            except Exception:
+                d = k
+            out[d] = v
+        return out
+
+    return convert(payload.get("RH2M", {})), convert(payload.get("ALLSKY_SFC_UVB", {}))
+
+
+def fetch_unit(unit, timezone=TIMEZONE, session=None, cache=None):
+    """JSON-serializable result of one unit of work."""
+    if unit.source == "archive":
+        return fetch_open_meteo_daily(unit.lat, unit.lon, unit.start, unit.end, timezone, session, cache)
+    if unit.source == "air_quality":
+        times, pm25, pm10 = fetch_open_meteo_pm_hourly(unit.lat, unit.lon, unit.start, unit.end, timezone, session, cache)
+        return {"time": times, "pm2_5": pm25, "pm10": pm10}
+    if unit.source == "nasa_power":
+        rh, uv = fetch_nasa_power(unit.lat, unit.lon, unit.start, unit.end, session, cache)
+        return {"RH2M": rh, "ALLSKY_SFC_UVB": uv}
+    raise ValueError(f"unknown source {unit.source!r}")
+
+
+# -------------------------
+# Checkpoints: one JSON file per finished unit
+# -------------------------
+def checkpoint_path(root, unit):
+    return Path(root) / unit.location.replace(" ", "_") / unit.source / f"{unit.start}_{unit.end}.json"
+
+
+def _unit_params(unit, timezone):
+    # NASA POWER is always read in UTC
+    return {"lat": unit.lat, "lon": unit.lon, "timezone": "UTC" if unit.source == "nasa_power" else timezone}
+
+
+def load_checkpoint(root, unit, timezone=TIMEZONE):
+    """Stored result of ``unit``, or None if missing/unreadable/fetched with other params."""
+    try:
+        with open(checkpoint_path(root, unit), encoding="utf-8") as fh:
+            stored = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if stored.get("params") != _unit_params(unit, timezone):
+        return None
+    return stored["data"]
+
+
+def save_checkpoint(root, unit, data, timezone=TIMEZONE):
+    """Atomically write a unit's result (an interrupted write never looks finished)."""
+    path = checkpoint_path(root, unit)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump({"params": _unit_params(unit, timezone), "data": data}, fh)
+    os.replace(tmp, path)
+
+
+def collect(units, checkpoint_dir, workers=4, timezone=TIMEZONE, resume=True, session=None, cache=None,
+            progress=None):
+    """
+    Fetch every unit (at most ``workers`` at a time) and checkpoint it.
+    Units with a valid checkpoint are loaded instead of fetched when ``resume``;
+    requests go through ``cache`` (a ResponseCache) when one is given.
+    Returns (results, failures): {unit: data} and {unit: error message}.
+    ``progress(unit, status)`` is called as units finish ("cached", "fetched", "failed").
+    """
+    results, failures = {}, {}
+    pending = []
+    for unit in units:
+        data = load_checkpoint(checkpoint_dir, unit, timezone) if resume else None
+        if data is None:
+            pending.append(unit)
+        else:
+            results[unit] = data
+            if progress:
+                progress(unit, "cached")
+
+    def run(unit):
+        data = fetch_unit(unit, timezone, session, cache)
+        save_checkpoint(checkpoint_dir, unit, data, timezone)
+        return data
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, unit): unit for unit in pending}
+        for future in as_completed(futures):
+            unit = futures[future]
+            try:
+                results[unit] = future.result()
+            except Exception as e:
+                failures[unit] = str(e)
+            if progress:
+                progress(unit, "failed" if unit in failures else "fetched")
+    return results, failures
+
+
+def merge_chunks(results, location, source):
+    """Concatenate a location's chunks of one source in date order."""
+    units = sorted((u for u in results if u.location == location and u.source == source), key=lambda u: u.start)
+    chunks = [results[unit] for unit in units]
+    if source == "nasa_power":
+        merged = {"RH2M": {}, "ALLSKY_SFC_UVB": {}}
+        for data in chunks:
+            for key in merged:
+                merged[key].update(data.get(key) or {})
+        return merged
+
+    series_key = "time"
+    keys = {key for data in chunks for key in data}
+    merged = defaultdict(list)
+    for data in chunks:
+        n = len(data.get(series_key) or [])
+        for key in keys:
+            merged[key].extend(data.get(key) or [None] * n)
+    return dict(merged)
+
+
+# -------------------------
+# Helpers: aggregate hourly -> daily mean, counts, max
+# -------------------------
+def _as_float_array(values):
+    """(float64 values with NaN where missing, mask of entries that aren't None)."""
+    try:
+        array = np.asarray(values, dtype=np.float64)
+        return array, ~np.isnan(array)
+    except (TypeError, ValueError):
+        # non-numeric entries still count as an observed hour, like the loop did
+        raw = pd.Series(values, dtype=object)
+        return pd.to_numeric(raw, errors="coerce").to_numpy(np.float64), raw.notna().to_numpy()
+
+
+def _daily_sum_max(codes, values, n_days):
+    """
+    Per-day (count, sum, max) of the non-NaN ``values`` grouped by ``codes``
+    (sorted, stable). Sums are added left to right like Python's sum(), one
+    day-vector at a time over a (days x samples) matrix, so means come out
+    bit-identical to the loop implementation.
+    """
+    keep = ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+    counts = np.bincount(codes, minlength=n_days)
+    width = int(counts.max()) if len(values) else 0
+    pos = np.arange(len(values)) - (np.cumsum(counts) - counts)[codes]
+
+    samples = np.zeros((n_days, width))
+    samples[codes, pos] = values
+    sums = np.zeros(n_days)
+    for j in range(width):
+        sums += samples[:, j]
+
+    samples.fill(-np.inf)
+    samples[codes, pos] = values
+    maxes = samples.max(axis=1) if width else np.full(n_days, -np.inf)
+    return counts, sums, maxes
+
+
+def aggregate_hourly_to_daily(times, pm25_vals, pm10_vals, min_hours=MIN_HOURLY_FOR_DAILY):
+    """
+    Aggregate hourly arrays to daily statistics.
+    Returns:
+      pm25_daily: dict date->daily_mean or None
+      pm10_daily: dict date->daily_mean or None
+      pm25_max_daily: dict date->daily_max or None
+      pm10_max_daily: dict date->daily_max or None
+      hour_counts: dict date->int (observed hour count)
+    Days are grouped and reduced as whole arrays; only days with at least one
+    observed hour appear, and days under ``min_hours`` map to None.
+    """
+    n = min(len(times), len(pm25_vals), len(pm10_vals))
+    raw_times = np.asarray(times[:n], dtype=object)
+    has_time = (raw_times != None) & (raw_times != "")  # noqa: E711 -- elementwise
+    v25, seen25 = _as_float_array(pm25_vals[:n])
+    v10, seen10 = _as_float_array(pm10_vals[:n])
+
+    # an hour counts if at least one pollutant value is present
+    observed = has_time & (seen25 | seen10)
+    day_keys = raw_times[observed].astype("U10")   # API returns times already in timezone param
+    v25, v10 = v25[observed], v10[observed]
+
+    if (day_keys[1:] >= day_keys[:-1]).all():
+        # hours come in time order, so every day is one contiguous run
+        starts = np.ones(len(day_keys), dtype=bool)
+        starts[1:] = day_keys[1:] != day_keys[:-1]
+        codes, days = np.cumsum(starts) - 1, day_keys[starts]
+    else:
+        codes, days = pd.factorize(day_keys, sort=True)
+        order = np.argsort(codes, kind="stable")
+        codes, v25, v10 = codes[order], v25[order], v10[order]
+
+    hours = np.bincount(codes, minlength=len(days))
+    count25, sum25, max25 = _daily_sum_max(codes, v25, len(days))
+    count10, sum10, max10 = _daily_sum_max(codes, v10, len(days))
+
+    enough = hours >= min_hours
+    ok25, ok10 = enough & (count25 > 0), enough & (count10 > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean25, mean10 = sum25 / count25, sum10 / count10
+
+    def as_dict(ok, values):
+        return dict(zip(days.tolist(), np.where(ok, values, None).tolist()))
+
+    return (
+        as_dict(ok25, mean25),
+        as_dict(ok10, mean10),
+        as_dict(ok25, max25),
+        as_dict(ok10, max10),
+        defaultdict(int, zip(days.tolist(), hours.tolist())),
+    )
+
+
+# -------------------------
+# Rows: one per day, using the archive's days as the canonical day list
+# -------------------------
+def build_rows(name, meteo, air_quality, nasa, min_hours=MIN_HOURLY_FOR_DAILY):
+    rh_data = nasa.get("RH2M") or {}
+    uv_data = nasa.get("ALLSKY_SFC_UVB") or {}
+    pm25_daily, pm10_daily, _, _, _ = aggregate_hourly_to_daily(
+        air_quality.get("time", []), air_quality.get("pm2_5", []), air_quality.get("pm10", []),
+        min_hours=min_hours,
+    )
+    aqi_days = sorted(pm25_daily.keys() | pm10_daily.keys())
+    aqi_daily = aqi.daily_aqi([pm25_daily.get(d) for d in aqi_days], [pm10_daily.get(d) for d in aqi_days])
+    aqi_by_day = dict(zip(aqi_days, zip(
+        aqi.as_ints(aqi_daily["aqi"]), aqi_daily["category"].tolist(), aqi_daily["dominant"].tolist()
+    )))
+
+    rows = []
+    times_daily = meteo.get("time", [])
+    n = len(times_daily)
+    for i in range(n):
+        day = times_daily[i]
+        tmin = meteo.get('temperature_2m_min', [None]*n)[i]
+        tmax = meteo.get('temperature_2m_max', [None]*n)[i]
+        tmean_list = meteo.get('temperature_2m_mean', None)
+        if tmean_list:
+            tmean = tmean_list[i]
+        else:
+            tmean = (tmin + tmax)/2 if (tmin is not None and tmax is not None) else None
+
+        aqi_value, aqi_category, aqi_dominant = aqi_by_day.get(day, (None, None, None))
+        rows.append({
+            "date": day,
+            "location": name,
+            "rainfall_mm": meteo.get('precipitation_sum', [None]*n)[i],
+            "humidity_percent": rh_data.get(day),
+            "temp_min_C": tmin,
+            "temp_max_C": tmax,
+            "temp_mean_C": tmean,
+            "wind_speed_kph": meteo.get('windspeed_10m_max', [None]*n)[i],
+            "wind_direction_deg": meteo.get('winddirection_10m_dominant', [None]*n)[i],
+            "uv_index": uv_data.get(day),
+            # PMs & AQI (one value per day)
+            "pm25": pm25_daily.get(day),
+            "pm10": pm10_daily.get(day),
+            "aqi": aqi_value,
+            "aqi_category": aqi_category,
+            "aqi_dominant_pollutant": aqi_dominant
+        })
+    return rows
+
+
+def location_rows(results, name, min_hours=MIN_HOURLY_FOR_DAILY):
+    """Daily rows of one location from the collected units."""
+    return build_rows(
+        name,
+        merge_chunks(results, name, "archive"),
+        merge_chunks(results, name, "air_quality"),
+        merge_chunks(results, name, "nasa_power"),
+        min_hours=min_hours,
+    )
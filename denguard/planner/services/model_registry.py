@@ -0,0 +1,75 @@
+# services/model_registry.py
+"""
+Process-wide registry for the SVM risk model.
+
+The pickled Pipeline is loaded once per worker and kept in memory. Every
+lookup does a cheap ``os.stat`` of the artifact; when its mtime/size (or the
+configured RISK_MODEL_VERSION) changes, one thread reloads it while the
+others keep serving the previous model, and the new one is swapped in with a
+single assignment. A ``train_risk_model --promote`` run leaves a metadata
+sidecar (``svm_weather_model.json``) whose version is logged on load.
+"""
+import json
+import logging
+import os
+import threading
+
+import joblib
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_reload_lock = threading.Lock()
+_current = (None, None)   # (artifact key, model) -- replaced as one tuple
+
+
+def _model_path():
+    return str(getattr(settings, "RISK_MODEL_PATH", "planner/model/svm_weather_model.pkl"))
+
+
+def _artifact_key(path):
+    """Identity of the artifact on disk: path, mtime, size and declared version."""
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size, getattr(settings, "RISK_MODEL_VERSION", None))
+
+
+def _sidecar_version(path):
+    """Version recorded by train_risk_model next to the artifact (None if absent)."""
+    try:
+        with open(os.path.splitext(path)[0] + ".json", encoding="utf-8") as fh:
+            return json.load(fh).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+def get_model():
+    """Return the loaded risk model, reloading it if the artifact changed."""
+    global _current
+    path = _model_path()
+    key = _artifact_key(path)
+    loaded_key, model = _current
+    if loaded_key == key:
+        return model
+
+    # Only wait for the lock on a cold start; otherwise serve the old model
+    # while another thread finishes the reload.
+    if not _reload_lock.acquire(blocking=model is None):
+        return model
+    try:
+        loaded_key, model = _current
+        if loaded_key != key:
+            model = joblib.load(path)
+            _current = (key, model)
+            logger.info("Loaded risk model from %s (version %s)", path, _sidecar_version(path))
+        return model
+    finally:
+        _reload_lock.release()
+
+
+def warm():
+    """Load the model eagerly (called from PlannerConfig.ready)."""
+    try:
+        get_model()
+    except Exception:
+        # never block startup (migrate, shell, ...) on a missing/broken artifact
+        logger.exception("Could not warm risk model from %s", _model_path())
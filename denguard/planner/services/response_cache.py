@@ -0,0 +1,93 @@
+# services/response_cache.py
+"""
+Content-addressed on-disk cache of raw upstream JSON responses.
+
+An entry is keyed by sha256 of the endpoint URL and its sorted query params
+(which include the date chunk), so any run that makes the same request --
+whatever it does with the answer afterwards -- reads the same file. Entries
+are optionally gzip-compressed. Responses marked immutable (archive data for
+days that are long settled) are served forever; the rest are re-fetched once
+older than ``ttl``. In offline mode nothing is fetched: every hit is served
+regardless of age and a miss raises ``OfflineMiss``.
+
+Like ``upstream``, deliberately free of Django imports.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from planner.services import upstream
+
+DEFAULT_TTL = 6 * 3600     # seconds a mutable (recent) response is reused
+
+
+class OfflineMiss(LookupError):
+    """Offline mode and the response isn't cached."""
+
+
+class ResponseCache:
+    def __init__(self, root, compress=True, offline=False, ttl=DEFAULT_TTL):
+        self.root = Path(root)
+        self.compress = compress
+        self.offline = offline
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params=None):
+        blob = json.dumps([url, sorted((str(k), str(v)) for k, v in (params or {}).items())], separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        folder = self.root / key[:2]
+        return folder / f"{key}.json.gz", folder / f"{key}.json"
+
+    def _read(self, key):
+        """(data, mtime) of a stored entry, compressed or not, or None."""
+        for path in self._paths(key):
+            try:
+                opener = gzip.open if path.suffix == ".gz" else open
+                with opener(path, "rb") as fh:
+                    return json.loads(fh.read()), path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def _write(self, key, data):
+        compressed, plain = self._paths(key)
+        path = compressed if self.compress else plain
+        blob = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        if self.compress:
+            blob = gzip.compress(blob, mtime=0)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(blob)
+        os.replace(tmp, path)
+        # never leave the other encoding behind with older contents
+        (plain if self.compress else compressed).unlink(missing_ok=True)
+
+    def get_json(self, url, params=None, immutable=False, timeout=30, session=None):
+        """Cached ``upstream.get_json``."""
+        key = self.key(url, params)
+        entry = self._read(key)
+        if entry is not None:
+            data, mtime = entry
+            if self.offline or immutable or time.time() - mtime < self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return data
+        if self.offline:
+            raise OfflineMiss(f"not in the response cache: {url} {params}")
+
+        data = upstream.get_json(url, params=params, timeout=timeout, session=session)
+        self._write(key, data)
+        with self._lock:
+            self.misses += 1
+        return data
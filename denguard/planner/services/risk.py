@@ -0,0 +1,66 @@
+# services/risk.py
+"""
+Feature rows and (batched) inference for the SVM risk model.
+
+Predictions for any number of rows go through one ``predict_rows`` call: the
+Pipeline's preprocessing runs once over the whole feature matrix and the
+classifier is evaluated on the transformed matrix, so per-call overhead of
+the Pipeline and SVC is paid once rather than once per city/day.
+"""
+import pandas as pd
+
+from planner.services.model_registry import get_model
+
+# Define column names (same as in training CSV, order matters)
+FEATURE_COLUMNS = [
+    "date", "location", "rainfall_mm", "humidity_percent",
+    "temp_min_C", "temp_max_C", "temp_mean_C",
+    "wind_speed_kph", "wind_direction_deg",
+    "uv_index", "pm25", "pm10", "aqi"
+]
+
+# Weather/air values stored per (location, date) -- FEATURE_COLUMNS minus keys
+WEATHER_FIELDS = FEATURE_COLUMNS[2:]
+
+# Fallbacks for values an upstream source didn't provide
+FEATURE_DEFAULTS = {
+    "rainfall_mm": 0.2,
+    "humidity_percent": 50.0,
+    "temp_min_C": 25.0,
+    "temp_max_C": 30.0,
+    "temp_mean_C": 27.0,
+    "wind_speed_kph": 10.0,
+    "wind_direction_deg": 180.0,
+    "uv_index": 0.02,
+    "pm25": 70.0,
+    "pm10": 84.0,
+    "aqi": 76.0,
+}
+
+
+def feature_row(day, city, weather):
+    """One model input row from a dict of WEATHER_FIELDS values (missing/0 -> default)."""
+    return [day, city] + [weather.get(f) or FEATURE_DEFAULTS[f] for f in WEATHER_FIELDS]
+
+
+def predict_rows(rows):
+    """
+    Score many feature rows at once.
+    Returns (labels, probabilities, classes): ``probabilities`` is an
+    (n_rows, n_classes) array ordered like ``classes``.
+    """
+    model = get_model()
+    X = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+
+    # Transform once, then run the final estimator twice on the same matrix
+    preprocess, classifier = model[:-1], model[-1]
+    Xt = preprocess.transform(X)
+    labels = classifier.predict(Xt)
+    probabilities = classifier.predict_proba(Xt)
+    return labels, probabilities, list(classifier.classes_)
+
+
+def predict_one(day, city, weather):
+    """Risk level for a single day/city (no probabilities)."""
+    X = pd.DataFrame([feature_row(day, city, weather)], columns=FEATURE_COLUMNS)
+    return get_model().predict(X)[0]
@@ -0,0 +1,104 @@
+# services/risk_scoring.py
+"""
+Rule-based dengue risk labels for the training data (the "risk" column).
+
+Each weather/air factor gets a piecewise-linear score in [0, 1], weighted and
+summed to 0-100, then bucketed into five levels. Every piece is evaluated for
+all rows at once with ``np.select``, so labelling millions of rows takes
+seconds. The rules, the order the weighted scores are summed in and the
+handling of missing values are the original row-by-row scorer's: a NaN
+temperature, rainfall, wind or UV value scores 0, a NaN humidity, PM2.5 or
+PM10 value scores 1 (it falls through to the last branch), so the labels
+are identical.
+"""
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = [
+    'temp_mean_C', 'rainfall_mm', 'humidity_percent',
+    'pm25', 'pm10', 'wind_speed_kph', 'uv_index'
+]
+
+RISK_LEVELS = ["Very Low", "Low", "Moderate", "High", "Very High"]
+LEVEL_UPPER_BOUNDS = [20, 40, 60, 80]     # inclusive; above the last is "Very High"
+
+# Columns the labelled dataset doesn't carry
+DROP_COLUMNS = ['aqi_category', 'aqi_dominant_pollutant']
+
+
+def _column(df, name):
+    return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
+
+
+def temperature_score(temp):
+    """Peaks at 26-30 °C (0–1)."""
+    return np.select(
+        [temp < 20, temp < 26, temp <= 30, temp < 33],
+        [0.0, (temp - 20) / 6, 1.0, (33 - temp) / 3],
+        0.0,
+    )
+
+
+def rainfall_score(rain):
+    """Rises to 60 mm, flat to 100 mm, then falls off (0–1)."""
+    falloff = 1 - (rain - 100) / 100
+    return np.select(
+        [rain < 1, rain <= 60, rain <= 100],
+        [0.0, rain / 60, 1.0],
+        np.where(falloff > 0, falloff, 0.0),    # max(0, falloff); NaN -> 0 like max(0, nan)
+    )
+
+
+def humidity_score(hum):
+    return np.select([hum < 60, hum < 80], [0.0, (hum - 60) / 20], 1.0)
+
+
+def pm25_score(pm25):
+    return np.select([pm25 < 15, pm25 < 50], [0.0, (pm25 - 15) / 35], 1.0)
+
+
+def pm10_score(pm10):
+    return np.select([pm10 < 30, pm10 < 100], [0.0, (pm10 - 30) / 70], 1.0)
+
+
+def wind_score(wind):
+    """Calm air favours mosquitoes (0–1)."""
+    return np.select([wind <= 5, wind < 20], [1.0, (20 - wind) / 15], 0.0)
+
+
+def uv_score(uv):
+    return np.select([uv <= 3, uv < 9], [1.0, (9 - uv) / 6], 0.0)
+
+
+def risk_scores(df):
+    """Weighted 0–100 score per row (float64 array)."""
+    with np.errstate(invalid="ignore"):
+        score = 25 * temperature_score(_column(df, 'temp_mean_C'))
+        score += 20 * rainfall_score(_column(df, 'rainfall_mm'))
+        score += 15 * humidity_score(_column(df, 'humidity_percent'))
+        score += 15 * pm25_score(_column(df, 'pm25'))
+        score += 10 * pm10_score(_column(df, 'pm10'))
+        score += 10 * wind_score(_column(df, 'wind_speed_kph'))
+        score += 5 * uv_score(_column(df, 'uv_index'))
+    return score
+
+
+def risk_labels(df):
+    """Risk level per row (object array of RISK_LEVELS names)."""
+    score = risk_scores(df)
+    return np.select(
+        [score <= bound for bound in LEVEL_UPPER_BOUNDS],
+        RISK_LEVELS[:-1],
+        RISK_LEVELS[-1],
+    ).astype(object)
+
+
+def label_dataset(df):
+    """
+    The labelled training set: numeric columns coerced (unparseable -> NaN),
+    a ``risk`` column added and the AQI text columns dropped.
+    """
+    df = df.copy()
+    df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    df['risk'] = risk_labels(df)
+    return df.drop(columns=DROP_COLUMNS, errors='ignore')
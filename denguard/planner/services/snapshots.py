@@ -0,0 +1,146 @@
+# services/snapshots.py
+"""
+Precomputed weather + risk snapshots, one per known city and day.
+
+The ``prefetch_weather`` management command refreshes them in the background
+and persists them as WeatherObservation / RiskPrediction rows; views read them
+with ``get_weather(city)`` and only fall back to computing inline when no row
+for today exists yet, or when it was stored while an upstream source was
+down (its ``missing_sources`` are retried on the next read).
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.db import transaction
+
+from planner.models import RiskPrediction, WeatherObservation
+from planner.services import risk
+from planner.services.risk import WEATHER_FIELDS
+from planner.services.tomorrow import CITY_COORDS, get_today_weather, get_today_weather_and_air, local_now
+
+# Cities whose weather is fetched live in parallel during a batch prediction
+BATCH_FETCH_WORKERS = 4
+
+_CITY_LOOKUP = {name.lower(): name for name in CITY_COORDS}
+
+
+def resolve_city(name):
+    """Canonical CITY_COORDS name for ``name`` (case/space-insensitive), or None."""
+    if not name:
+        return None
+    return _CITY_LOOKUP.get(name.strip().lower())
+
+
+def known_cities():
+    """Every city in CITY_COORDS plus every (resolvable) UserProfile.location."""
+    from users.models import UserProfile
+
+    cities = list(CITY_COORDS)
+    for location in UserProfile.objects.exclude(location="").values_list("location", flat=True).distinct():
+        city = resolve_city(location)
+        if city and city not in cities:
+            cities.append(city)
+    return cities
+
+
+def store_snapshot(city, data):
+    """Upsert the day's observation and prediction for ``city``."""
+    day = date.fromisoformat(data["date"])
+    observation = WeatherObservation(
+        location=city, date=day, missing_sources=sorted(data.get("missing_sources") or []),
+        **{f: data.get(f) for f in WEATHER_FIELDS},
+    )
+    prediction = RiskPrediction(location=city, date=day, risk_level=data["risk_level"])
+    with transaction.atomic():
+        WeatherObservation.objects.upsert([observation], [*WEATHER_FIELDS, "missing_sources"])
+        RiskPrediction.objects.upsert([prediction], ["risk_level"])
+
+
+def get_snapshot(city):
+    """Today's precomputed result for ``city`` (same shape as the live one), or None."""
+    today = local_now(city).date()
+    observation = (
+        WeatherObservation.objects.filter(location=city, date=today)
+        .values(*WEATHER_FIELDS, "missing_sources").first()
+    )
+    risk_level = RiskPrediction.objects.filter(location=city, date=today).values_list("risk_level", flat=True).first()
+    if observation is None or risk_level is None:
+        return None
+    missing = observation.pop("missing_sources")
+    data = {"date": today.isoformat(), "location": city, **observation, "risk_level": risk_level}
+    if missing:
+        data["missing_sources"] = missing
+    return data
+
+
+def refresh_snapshot(city):
+    """Compute and store the snapshot for ``city``; errors keep the previous one."""
+    data = get_today_weather_and_air(city)
+    if "error" not in data:
+        store_snapshot(city, data)
+    return data
+
+
+def get_weather(city):
+    """
+    Read path for views: precomputed snapshot, else compute inline once. A
+    snapshot stored with missing sources is recomputed on every read until it
+    is complete (and still served if recomputing fails outright).
+    Cities outside CITY_COORDS are computed live and never persisted.
+    """
+    if city not in CITY_COORDS:
+        return get_today_weather_and_air(city)
+    snapshot = get_snapshot(city)
+    if snapshot is not None and "missing_sources" not in snapshot:
+        return snapshot
+    # none yet, or partial: try again (sources that answered are cached upstream payloads)
+    data = refresh_snapshot(city)
+    return snapshot if "error" in data and snapshot is not None else data
+
+
+def predict_cities(cities):
+    """
+    Risk level and class probabilities for many cities with one predict call.
+    Stored observations for each city's local today are used where present;
+    the rest are fetched live (in parallel) and persisted.
+    Returns (results, errors, classes); each result carries its local date.
+    """
+    today = {city: local_now(city).date() for city in cities}
+    by_day = defaultdict(list)    # local dates span at most three days
+    for city, day in today.items():
+        by_day[day].append(city)
+    weather = {}
+    for day, group in by_day.items():
+        rows = WeatherObservation.objects.filter(location__in=group, date=day)
+        for row in rows.values("location", *WEATHER_FIELDS, "missing_sources"):
+            if not row.pop("missing_sources"):   # partial rows are fetched again
+                weather[row.pop("location")] = row
+
+    errors = {}
+    missing = [city for city in cities if city not in weather]
+    if missing:
+        with ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS) as pool:
+            for city, data in zip(missing, pool.map(get_today_weather, missing)):
+                if "error" in data:
+                    errors[city] = data["error"]
+                else:
+                    weather[city] = data
+
+    scored = [city for city in cities if city in weather]
+    if not scored:
+        return {}, errors, []
+
+    days = {city: today[city].isoformat() for city in scored}
+    labels, probabilities, classes = risk.predict_rows([risk.feature_row(days[city], city, weather[city]) for city in scored])
+
+    results = {}
+    for city, label, proba in zip(scored, labels, probabilities):
+        results[city] = {
+            "date": days[city],
+            "risk_level": str(label),
+            "probabilities": {cls: round(float(p), 4) for cls, p in zip(classes, proba)},
+        }
+        if city in missing:
+            store_snapshot(city, {"date": days[city], **weather[city], "risk_level": label})
+    return results, errors, classes
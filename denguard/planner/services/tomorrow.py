@@ -1,198 +1,419 @@
 # services/tomorrow.py  (Now uses Open-Meteo + NASA POWER instead of Tomorrow.io)
-import joblib
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import numpy as np
+import pandas as pd
+
+from planner.services import aqi, risk, upstream, weather_cache
+
+# City → Coordinates mapping (extend as needed)
+CITY_COORDS = {
+    # Bangladesh
+    "Dhaka": (23.8103, 90.4125),
+    "Chittagong": (22.3569, 91.7832),
+    "Khulna": (22.8456, 89.5403),
+
+    # North America
+    "Toronto": (43.65107, -79.347015),
+    "New York": (40.7128, -74.0060),
+    "Los Angeles": (34.0522, -118.2437),
+    "Chicago": (41.8781, -87.6298),
+    "Mexico City": (19.4326, -99.1332),
+
+    # Europe
+    "London": (51.5074, -0.1278),
+    "Paris": (48.8566, 2.3522),
+    "Berlin": (52.5200, 13.4050),
+    "Rome": (41.9028, 12.4964),
+    "Madrid": (40.4168, -3.7038),
+
+    # Asia
+    "Delhi": (28.6139, 77.2090),
+    "Mumbai": (19.0760, 72.8777),
+    "Tokyo": (35.6762, 139.6503),
+    "Beijing": (39.9042, 116.4074),
+    "Bangkok": (13.7563, 100.5018),
+    "Singapore": (1.3521, 103.8198),
+
+    # Oceania
+    "Sydney": ( -33.8688, 151.2093 ),
+    "Melbourne": ( -37.8136, 144.9631 ),
+
+    # Middle East
+    "Dubai": (25.276987, 55.296249),
+    "Riyadh": (24.7136, 46.6753),
+    "Istanbul": (41.0082, 28.9784),
+
+    # Africa
+    "Cairo": (30.0444, 31.2357),
+    "Johannesburg": (-26.2041, 28.0473),
+    "Nairobi": (-1.2921, 36.8219)
+}
+DEFAULT_COORDS = CITY_COORDS["Dhaka"]
+
+# City → IANA time zone: "today" (and the cache day) is the city's local date,
+# the same day boundaries Open-Meteo's timezone=auto daily/hourly arrays use
+CITY_TIMEZONES = {
+    "Dhaka": "Asia/Dhaka",
+    "Chittagong": "Asia/Dhaka",
+    "Khulna": "Asia/Dhaka",
+    "Toronto": "America/Toronto",
+    "New York": "America/New_York",
+    "Los Angeles": "America/Los_Angeles",
+    "Chicago": "America/Chicago",
+    "Mexico City": "America/Mexico_City",
+    "London": "Europe/London",
+    "Paris": "Europe/Paris",
+    "Berlin": "Europe/Berlin",
+    "Rome": "Europe/Rome",
+    "Madrid": "Europe/Madrid",
+    "Delhi": "Asia/Kolkata",
+    "Mumbai": "Asia/Kolkata",
+    "Tokyo": "Asia/Tokyo",
+    "Beijing": "Asia/Shanghai",
+    "Bangkok": "Asia/Bangkok",
+    "Singapore": "Asia/Singapore",
+    "Sydney": "Australia/Sydney",
+    "Melbourne": "Australia/Melbourne",
+    "Dubai": "Asia/Dubai",
+    "Riyadh": "Asia/Riyadh",
+    "Istanbul": "Europe/Istanbul",
+    "Cairo": "Africa/Cairo",
+    "Johannesburg": "Africa/Johannesburg",
+    "Nairobi": "Africa/Nairobi",
+}
+DEFAULT_TIMEZONE = CITY_TIMEZONES["Dhaka"]
+
+# Per-source time budget (seconds). A source that misses its budget is
+# reported as missing and the prediction falls back to default features.
+SOURCE_TIMEOUTS = {
+    "forecast": 10,
+    "air_quality": 10,
+    "nasa_power": 20,
+}
+
+# Forecast horizons requested from Open-Meteo: the default week, or its
+# 16-day maximum for longer outlooks (two cache entries per place at most)
+FORECAST_DAYS = (7, 16)
+
+# How far back NASA POWER is read when today's daily value isn't published yet
+NASA_FALLBACK_DAYS = 85
+
+# Shared, bounded pools: cache misses on the request path, and background
+# (stale-while-revalidate) refreshes, kept apart so refreshes never queue
+# ahead of a request. A fetch that overruns its budget keeps its worker until
+# it finishes, so concurrent misses for the same payload share one fetch.
+FETCH_WORKERS = 12
+REFRESH_WORKERS = 4
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="weather-src")
+_refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="weather-refresh")
+_inflight = {}    # cache key -> future of the fetch filling it
+_inflight_lock = threading.Lock()
+
+
+def local_now(city):
+    """Current wall-clock time in ``city`` (naive); unknown cities use Dhaka, like their coordinates."""
+    return datetime.now(ZoneInfo(CITY_TIMEZONES.get(city, DEFAULT_TIMEZONE))).replace(tzinfo=None)
+
+
+# -------------------------
+# Upstream sources (each returns the raw payload it needs, or raises)
+# -------------------------
+def forecast_horizon(days):
+    """Smallest FORECAST_DAYS horizon covering ``days`` (capped at the longest)."""
+    return next((n for n in FORECAST_DAYS if days <= n), FORECAST_DAYS[-1])
+
+
+def fetch_forecast(lat, lon, forecast_days=FORECAST_DAYS[0]):
+    """Open-Meteo daily weather for the next ``forecast_days`` days."""
+    meteo_url = (
+        "https://api.open-meteo.com/v1/forecast?"
+        f"latitude={lat}&longitude={lon}"
+        "&daily=temperature_2m_max,temperature_2m_min,temperature_2m_mean,"
+        "precipitation_sum,wind_speed_10m_max,wind_direction_10m_dominant"
+        f"&forecast_days={forecast_days}"
+        "&timezone=auto"
+    )
+    return upstream.get_json(meteo_url, timeout=SOURCE_TIMEOUTS["forecast"]).get("daily", {})
+
+
+def fetch_air_quality(lat, lon):
+    """Open-Meteo hourly air quality."""
+    air_url = (
+        "https://air-quality-api.open-meteo.com/v1/air-quality?"
+        f"latitude={lat}&longitude={lon}"
+        "&hourly=pm10,pm2_5,us_aqi"
+        "&timezone=auto"
+    )
+    return upstream.get_json(air_url, timeout=SOURCE_TIMEOUTS["air_quality"]).get("hourly", {})
+
+
+def _fetch_nasa_day(lat, lon, day, timeout):
+    """NASA POWER humidity & UV for the single day ``day``: the ``parameter`` block keyed by YYYYMMDD."""
+    nasa_params = {
+        "parameters": "RH2M,ALLSKY_SFC_UVB",  # same params you used in historical code
+        "start": day.strftime("%Y%m%d"),
+        "end": day.strftime("%Y%m%d"),
+        "latitude": lat,
+        "longitude": lon,
+        "community": "AG",          # add this (was in your working code)
+        "format": "JSON",
+        "time-standard": "UTC"      # add this too (was in your working code)
+    }
+    payload = upstream.get_json(
+        "https://power.larc.nasa.gov/api/temporal/daily/point",
+        params=nasa_params,
+        timeout=timeout
+    )
+    return payload.get("properties", {}).get("parameter", {})
+
+
+def fetch_nasa_power(lat, lon, day):
+    """
+    NASA POWER humidity & UV for ``day``, plus the fallback day only when
+    ``day`` isn't published yet -- two single-day requests at most, each
+    with half the source's budget. Returns the ``parameter`` blocks merged,
+    keyed by YYYYMMDD.
+    """
+    timeout = SOURCE_TIMEOUTS["nasa_power"] / 2
+    payload = _fetch_nasa_day(lat, lon, day, timeout)
+    if _nasa_unpublished(*_nasa_read(payload, day.strftime("%Y%m%d"))):
+        fallback = _fetch_nasa_day(lat, lon, day - timedelta(days=NASA_FALLBACK_DAYS), timeout)
+        for name, values in fallback.items():
+            payload[name] = {**(payload.get(name) or {}), **values}
+    return payload
+
+
+def _fetch_once(name, lat, lon, day, fetch, args, variant):
+    """Future of the fetch for one cache entry, joining the one already running if any."""
+    key = weather_cache.cache_key(name, lat, lon, day, variant)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = _executor.submit(weather_cache.fetch_and_store, name, lat, lon, day, fetch, args, variant)
+        _inflight[key] = future
+
+    def forget(done):
+        with _inflight_lock:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+    future.add_done_callback(forget)
+    return future
+
+
+def fetch_sources(lat, lon, now, forecast_days=FORECAST_DAYS[0]):
+    """
+    Fetch every upstream source in parallel, going through the payload cache
+    (the forecast is cached per ``forecast_days`` horizon).
+    Returns (payloads, errors): payloads maps source name -> payload for the
+    sources that were cached or answered within their budget, errors maps the
+    rest -> message.
+
+    Misses run on the shared, fixed-size pool; a source that overruns its
+    budget is reported and left to finish (and fill the cache) there, and
+    requests missing the same payload meanwhile wait on that same fetch.
+    """
+    started = time.monotonic()
+    day = now.strftime("%Y-%m-%d")
+    sources = {
+        "forecast": (fetch_forecast, (lat, lon, forecast_days)),
+        "air_quality": (fetch_air_quality, (lat, lon)),
+        "nasa_power": (fetch_nasa_power, (lat, lon, now)),
+    }
+    variants = {"forecast": f"{forecast_days}d"}
+
+    payloads, errors, futures = {}, {}, {}
+    for name, (fetch, args) in sources.items():
+        variant = variants.get(name)
+        cached = weather_cache.lookup(name, lat, lon, day, fetch, args, _refresh_executor, variant)
+        if cached is not None:
+            payloads[name] = cached
+        else:
+            futures[name] = _fetch_once(name, lat, lon, day, fetch, args, variant)
+
+    for name, future in futures.items():
+        remaining = max(0.0, started + SOURCE_TIMEOUTS[name] - time.monotonic())
+        try:
+            payloads[name] = future.result(timeout=remaining)
+        except FutureTimeout:
+            errors[name] = f"{name} timed out after {SOURCE_TIMEOUTS[name]}s"
+        except requests.RequestException as e:
+            errors[name] = str(e)
+    return payloads, errors
+
+
+# -------------------------
+# Payload → feature values
+# -------------------------
+def _hourly_daily_means(hourly):
+    """
+    Per-day means of PM2.5, PM10 and US AQI: {YYYY-MM-DD: (pm25, pm10, aqi)}.
+    Grouped as whole columns; a day without hourly US AQI gets the US-EPA AQI
+    of its mean PM2.5/PM10 instead (planner.services.aqi).
+    """
+    times = hourly.get("time") or []
+    if not times:
+        return {}
+    n = len(times)
+
+    def column(key):
+        values = list(hourly.get(key) or [])[:n]
+        return np.array(values + [None] * (n - len(values)), dtype=np.float64)
+
+    frame = pd.DataFrame({"pm25": column("pm2_5"), "pm10": column("pm10"), "aqi": column("us_aqi")})
+    means = frame.groupby(np.asarray(times, dtype="U10"), sort=False).mean()
+    from_pm = aqi.daily_aqi(means["pm25"].to_numpy(), means["pm10"].to_numpy())["aqi"]
+    means["aqi"] = means["aqi"].fillna(pd.Series(from_pm, index=means.index))
+    means = means.astype(object).where(means.notna(), None)
+    return {day: tuple(row) for day, row in zip(means.index, means.itertuples(index=False))}
+
+
+def _hourly_means_for_day(hourly, day_str):
+    """Mean PM2.5, PM10 and US AQI over the hourly samples of ``day_str``."""
+    return _hourly_daily_means(hourly).get(day_str, (None, None, None))
+
+
+def _nasa_read(payload, day_key):
+    """Humidity & UV for ``day_key`` (YYYYMMDD) from a NASA POWER parameter block."""
+    # Read by exact date key (YYYYMMDD) instead of list(...)[0]
+    humidity_raw = (payload.get("RH2M", {}) or {}).get(day_key)
+    uv_raw       = (payload.get("ALLSKY_SFC_UVB", {}) or {}).get(day_key)
+    humidity = float(humidity_raw) if humidity_raw is not None else None
+    uv_index = float(uv_raw) if uv_raw is not None else None
+    return humidity, uv_index
+
+
+def _nasa_unpublished(humidity, uv_index):
+    return humidity is None or humidity == -999.0 and uv_index is None or uv_index == -999.0
+
+
+def _nasa_values(payload, now):
+    """Humidity & UV for today, falling back to the older day if not published yet."""
+    humidity, uv_index = _nasa_read(payload, now.strftime("%Y%m%d"))
+
+    # Fallback if today's daily isn’t published yet
+    if _nasa_unpublished(humidity, uv_index):
+        yday_nasa = (now - timedelta(days=NASA_FALLBACK_DAYS)).strftime("%Y%m%d")
+        humidity, uv_index = _nasa_read(payload, yday_nasa)
+    return humidity, uv_index
+
+
+def get_today_weather(city):
+    """
+    Today's weather and air quality for ``city`` (no prediction).
+    Sources are fetched concurrently; if some of them fail or time out the
+    result lists them under ``missing_sources``. Only when every source fails
+    is ``{"error": ...}`` returned.
+    """
+    lat, lon = CITY_COORDS.get(city, DEFAULT_COORDS)  # Default: Dhaka
+
+    now = local_now(city)
+    today = now.strftime("%Y-%m-%d")
+
+    payloads, errors = fetch_sources(lat, lon, now)
+    if not payloads:
+        return {"error": "; ".join(errors.values())}
+
+    daily = payloads.get("forecast", {})
+    pm25_val, pm10_val, aqi_val = _hourly_means_for_day(payloads.get("air_quality", {}), today)
+    humidity, uv_index = _nasa_values(payloads.get("nasa_power", {}), now)
+
+    data = {
+        "date": today,
+        "location": city,
+        "rainfall_mm": daily.get("precipitation_sum", [None])[0],
+        "humidity_percent": humidity,
+        "temp_min_C": daily.get("temperature_2m_min", [None])[0],
+        "temp_max_C": daily.get("temperature_2m_max", [None])[0],
+        "temp_mean_C": daily.get("temperature_2m_mean", [None])[0],
+        "wind_speed_kph": daily.get("wind_speed_10m_max", [None])[0],
+        "wind_direction_deg": daily.get("wind_direction_10m_dominant", [None])[0],
+        "uv_index": uv_index,
+        "pm25": pm25_val,
+        "pm10": pm10_val,
+        "aqi": aqi_val,
+    }
+    if errors:
+        data["missing_sources"] = sorted(errors)
+    return data
+
 
 def get_today_weather_and_air(city):
     """
     Fetch today's weather and air quality using Open-Meteo + NASA POWER APIs
     Returns data in the same structure as the old Tomorrow.io version.
+    Missing values fall back to risk.FEATURE_DEFAULTS for the prediction.
     """
-    # City → Coordinates mapping (extend as needed)
-    city_coords = {
-        # Bangladesh
-        "Dhaka": (23.8103, 90.4125),
-        "Chittagong": (22.3569, 91.7832),
-        "Khulna": (22.8456, 89.5403),
-
-        # North America
-        "Toronto": (43.65107, -79.347015),
-        "New York": (40.7128, -74.0060),
-        "Los Angeles": (34.0522, -118.2437),
-        "Chicago": (41.8781, -87.6298),
-        "Mexico City": (19.4326, -99.1332),
-
-        # Europe
-        "London": (51.5074, -0.1278),
-        "Paris": (48.8566, 2.3522),
-        "Berlin": (52.5200, 13.4050),
-        "Rome": (41.9028, 12.4964),
-        "Madrid": (40.4168, -3.7038),
-
-        # Asia
-        "Delhi": (28.6139, 77.2090),
-        "Mumbai": (19.0760, 72.8777),
-        "Tokyo": (35.6762, 139.6503),
-        "Beijing": (39.9042, 116.4074),
-        "Bangkok": (13.7563, 100.5018),
-        "Singapore": (1.3521, 103.8198),
-
-        # Oceania
-        "Sydney": ( -33.8688, 151.2093 ),
-        "Melbourne": ( -37.8136, 144.9631 ),
-
-        # Middle East
-        "Dubai": (25.276987, 55.296249),
-        "Riyadh": (24.7136, 46.6753),
-        "Istanbul": (41.0082, 28.9784),
-
-        # Africa
-        "Cairo": (30.0444, 31.2357),
-        "Johannesburg": (-26.2041, 28.0473),
-        "Nairobi": (-1.2921, 36.8219)
-    }
+    data = get_today_weather(city)
+    if "error" in data:
+        return data
+    data["risk_level"] = risk.predict_one(data["date"], city, data)
+    return data
 
-    lat, lon = city_coords.get(city, (23.8103, 90.4125))  # Default: Dhaka
-
-    today = datetime.utcnow().strftime("%Y-%m-%d")
-
-    try:
-        # 1 Open-Meteo daily weather
-        meteo_url = (
-            "https://api.open-meteo.com/v1/forecast?"
-            f"latitude={lat}&longitude={lon}"
-            "&daily=temperature_2m_max,temperature_2m_min,temperature_2m_mean,"
-            "precipitation_sum,wind_speed_10m_max,wind_direction_10m_dominant"
-            "&timezone=auto"
-        )
-        meteo_data = requests.get(meteo_url).json()
-        daily = meteo_data.get("daily", {})
-
-        # 2 Open-Meteo hourly air quality
-        air_url = (
-            "https://air-quality-api.open-meteo.com/v1/air-quality?"
-            f"latitude={lat}&longitude={lon}"
-            "&hourly=pm10,pm2_5,us_aqi"
-            "&timezone=auto"
-        )
-        air_data = requests.get(air_url).json()
-        hourly = air_data.get("hourly", {})
-
-        # Use today's last available hourly value for PM & AQI
-        if "time" in hourly and hourly["time"]:
-            today_mask = [i for i, t in enumerate(hourly["time"]) if t.startswith(today)]
-            if today_mask:
-                pm25_val = sum(hourly["pm2_5"][i] for i in today_mask) / len(today_mask)
-                pm10_val = sum(hourly["pm10"][i] for i in today_mask) / len(today_mask)
-                aqi_val  = sum(hourly["us_aqi"][i] for i in today_mask) / len(today_mask)
-            else:
-                pm25_val = pm10_val = aqi_val = None
-        else:
-            pm25_val = pm10_val = aqi_val = None
-
-
-        # 3 NASA POWER humidity & UV
-        today_nasa = datetime.utcnow().strftime("%Y%m%d")
-
-        nasa_params = {
-            "parameters": "RH2M,ALLSKY_SFC_UVB",  # same params you used in historical code
-            "start": today_nasa,
-            "end": today_nasa,
-            "latitude": lat,
-            "longitude": lon,
-            "community": "AG",          # add this (was in your working code)
-            "format": "JSON",
-            "time-standard": "UTC"      # add this too (was in your working code)
-        }
-
-        resp = requests.get(
-            "https://power.larc.nasa.gov/api/temporal/daily/point",
-            params=nasa_params,
-            timeout=20
-        )
-        resp.raise_for_status()
-        payload = resp.json().get("properties", {}).get("parameter", {})
-
-        # Read by exact date key (YYYYMMDD) instead of list(...)[0]
-        humidity_raw = (payload.get("RH2M", {}) or {}).get(today_nasa)
-        uv_raw       = (payload.get("ALLSKY_SFC_UVB", {}) or {}).get(today_nasa)
-
-        humidity = float(humidity_raw) if humidity_raw is not None else None
-        uv_index = float(uv_raw) if uv_raw is not None else None
-
-        # Fallback to yesterday if today's daily isn’t published yet
-        if humidity is None or humidity == -999.0 and uv_index is None or uv_index == -999.0:
-            yday_nasa = (datetime.utcnow() - timedelta(days=85)).strftime("%Y%m%d")
-            nasa_params["start"] = nasa_params["end"] = yday_nasa
-            resp = requests.get(
-                "https://power.larc.nasa.gov/api/temporal/daily/point",
-                params=nasa_params,
-                timeout=20
-            )
-            resp.raise_for_status()
-            payload = resp.json().get("properties", {}).get("parameter", {})
-            humidity_raw = (payload.get("RH2M", {}) or {}).get(yday_nasa)
-            uv_raw       = (payload.get("ALLSKY_SFC_UVB", {}) or {}).get(yday_nasa)
-            humidity = float(humidity_raw) if humidity_raw is not None else None
-            uv_index = float(uv_raw) if uv_raw is not None else None
-
-
-        import pandas as pd
-
-        # Load trained model
-        model = joblib.load("planner/model/svm_weather_model.pkl")
-
-        # Define column names (same as in training CSV, order matters)
-        feature_columns = [
-            "date", "location", "rainfall_mm", "humidity_percent",
-            "temp_min_C", "temp_max_C", "temp_mean_C",
-            "wind_speed_kph", "wind_direction_deg",
-            "uv_index", "pm25", "pm10", "aqi"
-        ]
-
-        # Collect today's feature values
-        features = [
-            today,
-            city,
-            daily.get("precipitation_sum", [0.0])[0] or 0.2,
-            humidity or 50.0,
-            daily.get("temperature_2m_min", [25.0])[0] or 25.0,
-            daily.get("temperature_2m_max", [30.0])[0] or 30.0,
-            daily.get("temperature_2m_mean", [27.0])[0] or 27.0,
-            daily.get("wind_speed_10m_max", [5.0])[0] or 10.0,
-            daily.get("wind_direction_10m_dominant", [180.0])[0] or 180.0,
-            uv_index or 0.02,
-            pm25_val or 70.0,
-            pm10_val or 84.0,
-            aqi_val or 76.0,
-        ]
-
-        # Build DataFrame with correct columns
-        X_today = pd.DataFrame([features], columns=feature_columns)
-
-        # Predict risk
-        risk_prediction = model.predict(X_today)[0]
-
-
-        # Build result keeping the same keys as before
-        data = {
-            "date": today,
+
+def get_weather_outlook(city, days=7):
+    """
+    Per-day weather for every day in the Open-Meteo ``daily`` block (up to
+    ``days``, at most 16), built from the same cached payloads as today's
+    snapshot -- outlooks beyond a week request (and cache) the 16-day
+    forecast instead of the 7-day one. Air quality is averaged per day for the
+    days the hourly forecast covers; NASA POWER only publishes past days, so
+    today's humidity/UV are carried forward.
+    Returns (rows, missing_sources) or {"error": ...}.
+    """
+    lat, lon = CITY_COORDS.get(city, DEFAULT_COORDS)
+    now = local_now(city)
+
+    payloads, errors = fetch_sources(lat, lon, now, forecast_horizon(days))
+    if not payloads:
+        return {"error": "; ".join(errors.values())}
+
+    daily = payloads.get("forecast", {})
+    air_by_day = _hourly_daily_means(payloads.get("air_quality", {}))
+    humidity, uv_index = _nasa_values(payloads.get("nasa_power", {}), now)
+
+    def column(key, i):
+        values = daily.get(key) or []
+        return values[i] if i < len(values) else None
+
+    rows = []
+    for i, day in enumerate((daily.get("time") or [])[:days]):
+        pm25_val, pm10_val, aqi_val = air_by_day.get(day, (None, None, None))
+        rows.append({
+            "date": day,
             "location": city,
-            "rainfall_mm": daily.get("precipitation_sum", [None])[0],
+            "rainfall_mm": column("precipitation_sum", i),
             "humidity_percent": humidity,
-            "temp_min_C": daily.get("temperature_2m_min", [None])[0],
-            "temp_max_C": daily.get("temperature_2m_max", [None])[0],
-            "temp_mean_C": daily.get("temperature_2m_mean", [None])[0],
-            "wind_speed_kph": daily.get("wind_speed_10m_max", [None])[0],
-            "wind_direction_deg": daily.get("wind_direction_10m_dominant", [None])[0],
+            "temp_min_C": column("temperature_2m_min", i),
+            "temp_max_C": column("temperature_2m_max", i),
+            "temp_mean_C": column("temperature_2m_mean", i),
+            "wind_speed_kph": column("wind_speed_10m_max", i),
+            "wind_direction_deg": column("wind_direction_10m_dominant", i),
             "uv_index": uv_index,
             "pm25": pm25_val,
             "pm10": pm10_val,
             "aqi": aqi_val,
-            "risk_level": risk_prediction
-        }
-        return data
+        })
+    return rows, sorted(errors)
+
+
+def get_risk_outlook(city, days=7):
+    """Risk level + class probabilities for each outlook day, scored in one batch."""
+    outlook = get_weather_outlook(city, days)
+    if isinstance(outlook, dict):
+        return outlook
+    rows, missing = outlook
+    if not rows:
+        return {"error": "forecast source returned no daily data", "missing_sources": missing}
 
-    except requests.RequestException as e:
-        return {"error": str(e)}
+    labels, probabilities, classes = risk.predict_rows([risk.feature_row(r["date"], city, r) for r in rows])
+    for row, label, proba in zip(rows, labels, probabilities):
+        row["risk_level"] = str(label)
+        row["probabilities"] = {cls: round(float(p), 4) for cls, p in zip(classes, proba)}
+    return {"location": city, "days": rows, "missing_sources": missing}
@@ -0,0 +1,376 @@
+# services/training.py
+"""
+Training of the SVM risk model (the artifact ``model_registry`` serves).
+
+Same model as the original notebook -- median-imputed, standard-scaled
+numeric features plus one-hot date/location into an RBF ``SVC`` -- but the
+hyperparameter search runs over the whole Pipeline with ``n_jobs`` workers,
+and the Pipeline caches its fitted preprocessing in a ``joblib.Memory``, so
+the ColumnTransformer is fitted once per CV fold instead of once per
+candidate and fold. Every run is written to its own versioned directory
+(``model.pkl`` + ``metadata.json``); promoting a version atomically replaces
+the served artifact.
+
+``retrain`` is the nightly path: starting from a previous artifact it keeps
+that run's C/gamma and fitted preprocessing, folds only the days added since
+into the imputer and scaler statistics, and fits a single SVC. A full search
+runs instead when the new rows drift from what the scaler has seen, bring an
+unknown location or class, or the last full search is older than the
+schedule allows. Drift is judged against a limit that widens for small
+batches (a single day's mean is noisy), see ``drift_limit``.
+"""
+import hashlib
+import json
+import math
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.svm import SVC
+
+from planner.services import datasets
+from planner.services.risk import FEATURE_COLUMNS, WEATHER_FIELDS
+
+TARGET = "risk"
+NUMERIC_FEATURES = WEATHER_FIELDS
+CATEGORICAL_FEATURES = [c for c in FEATURE_COLUMNS if c not in WEATHER_FIELDS]
+
+PARAM_DISTRIBUTIONS = {
+    "classifier__C": np.logspace(-2, 2, 10),
+    "classifier__gamma": np.logspace(-2, 2, 10),
+}
+N_ITER = 5
+CV_FOLDS = 3
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+# Incremental retraining falls back to a full search when...
+FULL_SEARCH_EVERY_DAYS = 7       # ...the last one is older than this
+DRIFT_THRESHOLD = 1.5            # ...a feature's mean over the new rows moved more than this many stds
+DRIFT_CONFIDENCE_Z = 3.0         #    beyond the noise of a mean over that few rows (see drift_limit)
+MAX_NEW_FRACTION = 0.25          # ...more than this share of the rows is new
+
+ARTIFACTS_DIR = Path(__file__).resolve().parent.parent / "model" / "artifacts"
+MODEL_FILE = "model.pkl"
+METADATA_FILE = "metadata.json"
+
+
+def load_training_data(path):
+    """Feature columns + target from a CSV or columnar dataset, in the dtypes the Pipeline expects."""
+    df = datasets.load(path, columns=FEATURE_COLUMNS + [TARGET])
+    df = df.dropna(subset=[TARGET])
+    df[NUMERIC_FEATURES] = df[NUMERIC_FEATURES].astype(np.float64)
+    return df.astype({c: object for c in CATEGORICAL_FEATURES + [TARGET]}).reset_index(drop=True)
+
+
+def fingerprint(df):
+    """Stable hash of a DataFrame's contents (recorded so a run can be tied to its data)."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def last_dates(df):
+    """{location: last ISO date} in the training data (what the next incremental run starts after)."""
+    return df.groupby("location")["date"].max().astype(str).to_dict()
+
+
+def split_keys(df, mask):
+    """{location: [ISO dates]} of the rows selected by ``mask`` (how a run records its test split)."""
+    rows = df.loc[mask, ["location", "date"]].astype(str)
+    return {location: sorted(dates) for location, dates in rows.groupby("location")["date"]}
+
+
+def keys_mask(df, keys):
+    """True for the rows listed in a ``split_keys`` mapping."""
+    pairs = {(location, date) for location, dates in keys.items() for date in dates}
+    return np.array([(str(l), str(d)) in pairs for l, d in zip(df["location"], df["date"])], dtype=bool)
+
+
+def new_rows_mask(df, previous_last_dates):
+    """True for the rows of days a previous run hadn't seen (or of locations it didn't know)."""
+    last = df["location"].map(previous_last_dates)
+    return (last.isna() | (df["date"].astype(str) > last.astype(str))).to_numpy()
+
+
+def build_pipeline(memory=None):
+    numeric = Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler()),
+    ])
+    categorical = Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="most_frequent")),
+        ("onehot", OneHotEncoder(handle_unknown="ignore")),
+    ])
+    preprocessor = ColumnTransformer(transformers=[
+        ("num", numeric, NUMERIC_FEATURES),
+        ("cat", categorical, CATEGORICAL_FEATURES),
+    ])
+    svm = SVC(kernel="rbf", class_weight="balanced", probability=True, random_state=RANDOM_STATE)
+    return Pipeline(steps=[("preprocessor", preprocessor), ("classifier", svm)], memory=memory)
+
+
+def split(df, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """(X_train, X_test, y_train, y_test) -- the notebook's split."""
+    return train_test_split(df[FEATURE_COLUMNS], df[TARGET], test_size=test_size, random_state=random_state)
+
+
+def extend_split(df, previous_test_keys, new, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """
+    Split like ``split``, but keeping a previous run's split: its test rows
+    stay held out (the rows it trained on must not be scored as unseen) and
+    ``test_size`` of the ``new`` rows are held out with them.
+    """
+    test = keys_mask(df, previous_test_keys) & ~new
+    new_rows = np.flatnonzero(new)
+    held = np.random.RandomState(random_state).choice(new_rows, round(len(new_rows) * test_size), replace=False)
+    test[held] = True
+    X, y = df[FEATURE_COLUMNS], df[TARGET]
+    return X[~test], X[test], y[~test], y[test]
+
+
+def library_versions():
+    return {"sklearn": sklearn.__version__, "numpy": np.__version__, "pandas": pd.__version__,
+            "python": platform.python_version()}
+
+
+def evaluate(model, X_test, y_test):
+    """Held-out metrics plus batched inference timing."""
+    started = time.perf_counter()
+    y_pred = model.predict(X_test)
+    seconds = time.perf_counter() - started
+    labels = list(model.classes_)
+    metrics = {
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+        "classification_report": classification_report(y_test, y_pred, output_dict=True, zero_division=0),
+        "confusion_matrix": {"labels": labels, "matrix": confusion_matrix(y_test, y_pred, labels=labels).tolist()},
+    }
+    timing = {
+        "inference_seconds": seconds,
+        "inference_rows": len(X_test),
+        "inference_us_per_row": seconds / max(len(X_test), 1) * 1e6,
+    }
+    return metrics, timing
+
+
+def train(df, n_jobs=-1, cache_dir=None, n_iter=N_ITER, cv=CV_FOLDS,
+          test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """
+    Search C/gamma over the full Pipeline and refit the best one on the
+    training split. Returns (model, metadata) -- the model's Pipeline has no
+    cache attached, so it pickles and serves like the original artifact.
+    """
+    X_train, X_test, y_train, y_test = split(df, test_size, random_state)
+    memory = joblib.Memory(str(cache_dir), verbose=0) if cache_dir else None
+    search = RandomizedSearchCV(
+        build_pipeline(memory), param_distributions=PARAM_DISTRIBUTIONS, n_iter=n_iter,
+        scoring="accuracy", cv=cv, random_state=random_state, n_jobs=n_jobs,
+    )
+    started = time.perf_counter()
+    search.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    model = search.best_estimator_.set_params(memory=None)
+    metrics, timing = evaluate(model, X_test, y_test)
+    metrics["cv_best_accuracy"] = float(search.best_score_)
+    metadata = {
+        "features": {"numeric": NUMERIC_FEATURES, "categorical": CATEGORICAL_FEATURES, "target": TARGET},
+        "classes": [str(c) for c in model.classes_],
+        "best_params": {k.split("__", 1)[1]: float(v) for k, v in search.best_params_.items()},
+        "search": {"n_iter": n_iter, "cv": cv, "random_state": random_state, "n_jobs": n_jobs},
+        "data": {"rows": len(df), "train_rows": len(X_train), "test_rows": len(X_test),
+                 "sha256": fingerprint(df), "last_dates": last_dates(df),
+                 "test_keys": split_keys(df, df.index.isin(X_test.index))},
+        "metrics": metrics,
+        "timings": {"fit_seconds": fit_seconds, **timing},
+        "mode": "full",
+        "full_search_at": datetime.now(timezone.utc).isoformat(),
+        "full_fit_seconds": fit_seconds,
+        "full_fit_train_rows": len(X_train),
+        "versions": library_versions(),
+    }
+    return model, metadata
+
+
+def new_version():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _write_atomic(path, write):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _dump_json(data):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+    return write
+
+
+def save_artifact(model, metadata, version=None, root=ARTIFACTS_DIR):
+    """Write ``<root>/<version>/model.pkl`` and ``metadata.json``; returns the directory."""
+    version = version or new_version()
+    folder = Path(root) / version
+    metadata = {"version": version, "created_at": datetime.now(timezone.utc).isoformat(), **metadata}
+    _write_atomic(folder / MODEL_FILE, lambda tmp: joblib.dump(model, tmp))
+    _write_atomic(folder / METADATA_FILE, _dump_json(metadata))
+    return folder
+
+
+def load_metadata(folder):
+    with open(Path(folder) / METADATA_FILE, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def sidecar_path(model_path):
+    """Metadata file kept next to the served artifact (svm_weather_model.pkl -> .json)."""
+    return Path(model_path).with_suffix(".json")
+
+
+def promote(folder, model_path):
+    """
+    Serve the artifact in ``folder``: its metadata goes next to ``model_path``
+    first, then the model file is swapped in with one rename, so the registry
+    (keyed on the file's mtime/size) never sees a half-written model.
+    """
+    _write_atomic(sidecar_path(model_path), _dump_json(load_metadata(folder)))
+    _write_atomic(model_path, lambda tmp: shutil.copyfile(Path(folder) / MODEL_FILE, tmp))
+
+
+def latest_artifact(root=ARTIFACTS_DIR):
+    """Directory of the most recently created artifact under ``root`` (None if there is none)."""
+    folders = [f for f in Path(root).glob("*") if (f / METADATA_FILE).exists()]
+    if not folders:
+        return None
+    return max(folders, key=lambda f: load_metadata(f)["created_at"])
+
+
+def drift_scores(scaler, X_new):
+    """Per-feature shift of the new rows' mean, in standard deviations of what ``scaler`` has seen."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.abs(np.nanmean(X_new, axis=0) - scaler.mean_) / scaler.scale_
+    return dict(zip(NUMERIC_FEATURES, np.nan_to_num(shift).tolist()))
+
+
+def drift_limit(drift_threshold, rows):
+    """
+    Shift (in stds) the mean of ``rows`` new rows may show before it counts
+    as drift: ``drift_threshold`` plus DRIFT_CONFIDENCE_Z standard errors of
+    such a mean (std / sqrt(rows)). A single ordinary day is routinely a
+    couple of stds from the long-run mean; a week of them is not.
+    """
+    return drift_threshold + DRIFT_CONFIDENCE_Z / math.sqrt(rows) if rows else math.inf
+
+
+def full_search_reason(previous, df, new, drift, full_every_days, limit):
+    """Why the warm start can't be used (None if it can); ``limit`` is the drift_limit for the new rows."""
+    if not {"last_dates", "test_keys"} <= set(previous["data"]):
+        return "base artifact has no incremental state"
+    started = datetime.fromisoformat(previous["full_search_at"])
+    if datetime.now(timezone.utc) - started >= timedelta(days=full_every_days):
+        return f"last full search is older than {full_every_days} days"
+    if new.mean() > MAX_NEW_FRACTION:
+        return f"{new.sum()} of {len(df)} rows are new"
+    unknown = set(df.loc[new, "location"]) - set(previous["data"]["last_dates"])
+    if unknown:
+        return f"new locations: {', '.join(sorted(unknown))}"
+    classes = set(df.loc[new, TARGET]) - set(previous["classes"])
+    if classes:
+        return f"new classes: {', '.join(sorted(classes))}"
+    drifted = {k: v for k, v in drift.items() if v > limit}
+    if drifted:
+        return ("drift in " + ", ".join(f"{k} ({v:.2f} std)" for k, v in drifted.items())
+                + f" (limit {limit:.2f} std)")
+    return None
+
+
+def retrain(df, base, n_jobs=-1, cache_dir=None, n_iter=N_ITER, cv=CV_FOLDS,
+            test_size=TEST_SIZE, random_state=RANDOM_STATE,
+            full_every_days=FULL_SEARCH_EVERY_DAYS, drift_threshold=DRIFT_THRESHOLD):
+    """
+    Warm-start retraining from the artifact directory ``base``: the previous
+    best params are reused and the fitted imputer/scaler are updated with
+    the new rows -- the median from the current training split (cheap), the
+    scaler through ``partial_fit`` on the new rows only -- then one SVC is
+    fitted. The previous split is kept (``extend_split``). The one-hot encoder keeps its categories (unseen dates are
+    ignored, as at inference). Falls back to ``train`` (full search) when
+    ``full_search_reason`` says so. Returns (model, metadata).
+    """
+    previous = load_metadata(base)
+    new = new_rows_mask(df, previous["data"].get("last_dates", {}))
+    X_train, X_test, y_train, y_test = extend_split(df, previous["data"].get("test_keys", {}), new,
+                                                    test_size, random_state)
+    model = joblib.load(Path(base) / MODEL_FILE)
+    numeric = model.named_steps["preprocessor"].named_transformers_["num"]
+    imputer, scaler = numeric.named_steps["imputer"], numeric.named_steps["scaler"]
+
+    new_train = new[X_train.index]
+    X_new = X_train.loc[new_train, NUMERIC_FEATURES]
+    drift = drift_scores(scaler, imputer.transform(X_new)) if len(X_new) else {}
+    limit = drift_limit(drift_threshold, len(X_new))
+    reason = full_search_reason(previous, df, new, drift, full_every_days, limit)
+    if reason:
+        model, metadata = train(df, n_jobs=n_jobs, cache_dir=cache_dir, n_iter=n_iter, cv=cv,
+                                test_size=test_size, random_state=random_state)
+        metadata.update(base_version=previous["version"], full_search_reason=reason)
+        return model, metadata
+
+    started = time.perf_counter()
+    medians = np.nanmedian(X_train[NUMERIC_FEATURES].to_numpy(np.float64), axis=0)
+    imputer.statistics_ = np.where(np.isnan(medians), imputer.statistics_, medians)
+    if len(X_new):
+        scaler.partial_fit(imputer.transform(X_new))
+    preprocessor = model.named_steps["preprocessor"]
+    classifier = clone(model.named_steps["classifier"]).fit(preprocessor.transform(X_train), y_train)
+    model = Pipeline(steps=[("preprocessor", preprocessor), ("classifier", classifier)])
+    fit_seconds = time.perf_counter() - started
+
+    metrics, timing = evaluate(model, X_test, y_test)
+    data = {"rows": len(df), "train_rows": len(X_train), "test_rows": len(X_test),
+            "new_rows": int(new.sum()), "new_train_rows": int(new_train.sum()),
+            "sha256": fingerprint(df), "last_dates": last_dates(df),
+            "test_keys": split_keys(df, df.index.isin(X_test.index))}
+    metadata = {
+        **{k: previous[k] for k in ("features", "classes", "best_params", "search")},
+        "data": data,
+        "metrics": metrics,
+        "timings": {
+            "fit_seconds": fit_seconds,
+            **timing,
+            # the last full search's fit time, scaled to today's training rows
+            "full_fit_seconds_estimate": (previous["full_fit_seconds"] * len(X_train)
+                                          / previous["full_fit_train_rows"]),
+        },
+        "mode": "incremental",
+        "base_version": previous["version"],
+        "drift": drift,
+        "drift_limit": limit if len(X_new) else None,
+        "full_search_at": previous["full_search_at"],
+        "full_fit_seconds": previous["full_fit_seconds"],
+        "full_fit_train_rows": previous["full_fit_train_rows"],
+        "versions": library_versions(),
+    }
+    metadata["timings"]["seconds_saved"] = metadata["timings"]["full_fit_seconds_estimate"] - fit_seconds
+    return model, metadata
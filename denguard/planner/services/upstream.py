@@ -0,0 +1,119 @@
+# services/upstream.py
+"""
+Shared HTTP client for the upstream weather APIs (Open-Meteo, NASA POWER).
+
+One pooled keep-alive ``requests.Session`` per process, so repeated calls to
+the same host reuse the TCP/TLS connection instead of paying DNS + handshake
+every time. Transient failures (connection errors, 429 and 5xx) are retried a
+bounded number of times with jittered exponential backoff. Every call is
+accounted per host (requests, errors, bytes, latency) -- see ``stats()``.
+
+Deliberately free of Django imports so standalone scripts can use it too.
+"""
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "denguard/1.0"
+POOL_CONNECTIONS = 10   # number of hosts kept in the pool
+POOL_MAXSIZE = 16       # keep-alive connections per host (>= concurrent workers)
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5     # 0.5s, 1s, 2s ... plus jitter
+RETRY_JITTER = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def new_session(user_agent=USER_AGENT, pool_maxsize=POOL_MAXSIZE):
+    """Build a pooled session with retry/backoff mounted for http and https."""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        backoff_jitter=RETRY_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,   # hand the last response to raise_for_status()
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update({"User-Agent": user_agent})
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """The process-wide shared session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = new_session()
+    return _session
+
+
+def _record(host, elapsed, nbytes, failed):
+    with _stats_lock:
+        s = _stats.setdefault(host, {
+            "requests": 0, "errors": 0, "bytes": 0,
+            "seconds_total": 0.0, "seconds_max": 0.0,
+        })
+        s["requests"] += 1
+        s["errors"] += int(failed)
+        s["bytes"] += nbytes
+        s["seconds_total"] += elapsed
+        s["seconds_max"] = max(s["seconds_max"], elapsed)
+
+
+def get_json(url, params=None, timeout=30, session=None):
+    """
+    GET ``url`` and return the decoded JSON body.
+    Raises ``requests.RequestException`` (incl. HTTPError) after retries.
+    """
+    session = session or get_session()
+    host = urlsplit(url).netloc
+    started = time.monotonic()
+    nbytes, failed = 0, True
+    try:
+        resp = session.get(url, params=params, timeout=timeout)
+        nbytes = len(resp.content)
+        resp.raise_for_status()
+        data = resp.json()
+        failed = False
+        return data
+    finally:
+        elapsed = time.monotonic() - started
+        _record(host, elapsed, nbytes, failed)
+        logger.debug("GET %s -> %d bytes in %.3fs%s", host, nbytes, elapsed, " (failed)" if failed else "")
+
+
+def stats():
+    """Snapshot of per-host accounting: requests, errors, bytes, latency."""
+    with _stats_lock:
+        out = {}
+        for host, s in _stats.items():
+            row = dict(s)
+            row["seconds_avg"] = s["seconds_total"] / s["requests"] if s["requests"] else 0.0
+            out[host] = row
+        return out
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,70 @@
+# services/weather_cache.py
+"""
+Per-source cache for upstream weather / air-quality payloads.
+
+Entries are keyed by source, coordinates rounded to ~1 km, the date the
+payload is for and, where a source is requested in more than one shape
+(e.g. the forecast horizon), a variant, so every view (and every user) asking about the same place on
+the same day shares one upstream call. Each source has its own freshness TTL;
+once an entry is older than that it is still served immediately
+(stale-while-revalidate) while a single background refresh replaces it.
+Entries are dropped entirely after ``STALE_FACTOR`` x TTL.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Freshness per source (seconds)
+SOURCE_TTLS = {
+    "forecast": 15 * 60,          # model runs update several times a day
+    "air_quality": 30 * 60,
+    "nasa_power": 12 * 60 * 60,   # daily product, published once
+}
+STALE_FACTOR = 8
+REFRESH_LOCK_SECONDS = 60
+COORD_PRECISION = 2
+
+
+def cache_key(source, lat, lon, day, variant=None):
+    key = f"upstream:{source}:{round(lat, COORD_PRECISION)}:{round(lon, COORD_PRECISION)}:{day}"
+    return key if variant is None else f"{key}:{variant}"
+
+
+def _store(key, source, payload):
+    entry = {"payload": payload, "fetched_at": time.time()}
+    cache.set(key, entry, timeout=SOURCE_TTLS[source] * STALE_FACTOR)
+
+
+def _refresh(key, source, fetch, args):
+    try:
+        _store(key, source, fetch(*args))
+    except Exception:
+        logger.warning("Background refresh of %s failed; keeping stale payload", key, exc_info=True)
+    finally:
+        cache.delete(f"{key}:refresh")
+
+
+def lookup(source, lat, lon, day, fetch, args, executor, variant=None):
+    """
+    Return the cached payload for ``source`` or None on a miss.
+    A stale hit is returned as-is and schedules ``fetch(*args)`` on
+    ``executor`` -- at most one refresh per key at a time.
+    """
+    key = cache_key(source, lat, lon, day, variant)
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if time.time() - entry["fetched_at"] > SOURCE_TTLS[source]:
+        if cache.add(f"{key}:refresh", 1, timeout=REFRESH_LOCK_SECONDS):
+            executor.submit(_refresh, key, source, fetch, args)
+    return entry["payload"]
+
+
+def fetch_and_store(source, lat, lon, day, fetch, args, variant=None):
+    """Fetch ``source`` synchronously (cache miss) and cache the result."""
+    payload = fetch(*args)
+    _store(cache_key(source, lat, lon, day, variant), source, payload)
+    return payload
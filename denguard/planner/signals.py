@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import DengueStat
+from .services import heat_tiles
+from .services.dengue_cache import bump_data_version
+
+
+@receiver(pre_save, sender=DengueStat)
+def remember_old_position(sender, instance, **kwargs):
+    # tiles under the old position must go too if the point moves
+    instance._old_latlng = None
+    if instance.pk:
+        instance._old_latlng = (
+            DengueStat.objects.filter(pk=instance.pk).values_list("longitude", "latitude").first()
+        )
+
+
+@receiver(post_save, sender=DengueStat)
+@receiver(post_delete, sender=DengueStat)
+def invalidate_dengue_caches(sender, instance, **kwargs):
+    # only once the change is committed -- a rebuild in between would read
+    # the old rows and cache them under the new version / rewrite the tile
+    positions = {instance.map_latlng}
+    old = getattr(instance, "_old_latlng", None)
+    if old:
+        positions.add(tuple(old))
+
+    def invalidate():
+        bump_data_version()
+        for lat, lng in positions:
+            heat_tiles.invalidate_point(lat, lng)
+
+    transaction.on_commit(invalidate)
@@ -1,3 +1,906 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.contrib import admin
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from planner.geo import quadkey_for
+from planner.management.commands import benchmark
+from planner.models import CaseWindowSummary, DailyCaseCount, DengueStat, RiskPrediction, WeatherObservation
+from planner.services import (
+    aqi, case_windows, datasets, dengue_cache, heat_tiles, heatmap, history, model_registry, risk_scoring, snapshots, tomorrow,
+    training, weather_cache,
+)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class TempDirMixin:
+    """A fresh temporary directory per test, as ``self.tmp`` (a Path)."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+
+class TileDirMixin(TempDirMixin):
+    """LocMem cache and a temporary HEATMAP_TILE_DIR, for tests that touch DengueStat."""
+
+    def setUp(self):
+        super().setUp()
+        override = override_settings(CACHES=LOCMEM_CACHE, HEATMAP_TILE_DIR=self.tmp / "tiles")
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrate back to ``migrate_from``, let the test add rows, then run ``migrate_to``."""
+    migrate_from = migrate_to = None
+
+    def setUp(self):
+        super().setUp()
+        self.executor = MigrationExecutor(connection)
+        latest = self.executor.loader.graph.leaf_nodes()
+        self.addCleanup(lambda: MigrationExecutor(connection).migrate(latest))
+        self.executor.migrate([("planner", self.migrate_from)])
+        self.old_apps = self.executor.loader.project_state([("planner", self.migrate_from)]).apps
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("planner", self.migrate_to)])
+        return executor.loader.project_state([("planner", self.migrate_to)]).apps
+
+
+class ModelRegistryTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.tmp / "model.pkl"
+        joblib.dump({"name": "first"}, self.path)
+        override = override_settings(RISK_MODEL_PATH=self.path, RISK_MODEL_VERSION=None)
+        override.enable()
+        self.addCleanup(override.disable)
+        model_registry._current = (None, None)
+        self.addCleanup(setattr, model_registry, "_current", (None, None))
+
+    def test_model_is_loaded_once(self):
+        first = model_registry.get_model()
+        self.assertEqual(first, {"name": "first"})
+        self.assertIs(model_registry.get_model(), first)
+
+    def test_reloads_when_the_artifact_changes(self):
+        model_registry.get_model()
+        joblib.dump({"name": "second, a bigger artifact"}, self.path)
+        os.utime(self.path, ns=(1, 1))
+        self.assertEqual(model_registry.get_model(), {"name": "second, a bigger artifact"})
+
+    def test_reloads_when_the_version_setting_changes(self):
+        first = model_registry.get_model()
+        with override_settings(RISK_MODEL_VERSION="2"):
+            self.assertIsNot(model_registry.get_model(), first)
+
+    def test_warm_never_raises(self):
+        self.path.unlink()
+        with self.assertLogs("planner.services.model_registry", "ERROR"):
+            model_registry.warm()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class WeatherSourceTests(SimpleTestCase):
+    NOW = datetime(2025, 7, 20, 9, 0)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def nasa_calls(self, published):
+        calls = []
+
+        def get_json(url, params=None, timeout=None):
+            calls.append(params)
+            day = params["start"]
+            humidity, uv = (70.0, 7.0) if published or day != "20250720" else (-999.0, -999.0)
+            return {"properties": {"parameter": {"RH2M": {day: humidity}, "ALLSKY_SFC_UVB": {day: uv}}}}
+
+        with mock.patch.object(tomorrow.upstream, "get_json", side_effect=get_json):
+            payload = tomorrow.fetch_nasa_power(23.8, 90.4, self.NOW)
+        return calls, payload
+
+    def test_nasa_requests_only_today_when_published(self):
+        calls, payload = self.nasa_calls(published=True)
+        self.assertEqual([(c["start"], c["end"]) for c in calls], [("20250720", "20250720")])
+        self.assertEqual(tomorrow._nasa_values(payload, self.NOW), (70.0, 7.0))
+
+    def test_nasa_adds_the_single_fallback_day_when_unpublished(self):
+        calls, payload = self.nasa_calls(published=False)
+        self.assertEqual(
+            [(c["start"], c["end"]) for c in calls],
+            [("20250720", "20250720"), ("20250426", "20250426")],
+        )
+        self.assertEqual(tomorrow._nasa_values(payload, self.NOW), (70.0, 7.0))
+
+    def test_slow_source_is_reported_missing(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow(lat, lon, day):
+            release.wait(5)
+            return {}
+
+        with mock.patch.dict(tomorrow.SOURCE_TIMEOUTS, nasa_power=0.05), \
+                mock.patch.object(tomorrow, "fetch_forecast", return_value={"time": ["2025-07-20"]}), \
+                mock.patch.object(tomorrow, "fetch_air_quality", return_value={}), \
+                mock.patch.object(tomorrow, "fetch_nasa_power", slow):
+            payloads, errors = tomorrow.fetch_sources(23.8, 90.4, self.NOW)
+        self.assertEqual(sorted(payloads), ["air_quality", "forecast"])
+        self.assertEqual(list(errors), ["nasa_power"])
+
+    def test_concurrent_misses_share_one_bounded_fetch(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def slow(lat, lon, day):
+            calls.append(day)
+            release.wait(5)
+            return {}
+
+        with mock.patch.dict(tomorrow.SOURCE_TIMEOUTS, nasa_power=0.05), \
+                mock.patch.object(tomorrow, "fetch_forecast", return_value={}), \
+                mock.patch.object(tomorrow, "fetch_air_quality", return_value={}), \
+                mock.patch.object(tomorrow, "fetch_nasa_power", slow):
+            for _ in range(5):
+                _, errors = tomorrow.fetch_sources(23.8, 90.4, self.NOW)
+                self.assertEqual(list(errors), ["nasa_power"])
+        self.assertEqual(len(calls), 1)
+        workers = [t for t in threading.enumerate() if t.name.startswith("weather-src")]
+        self.assertLessEqual(len(workers), tomorrow.FETCH_WORKERS)
+        release.set()
+
+
+class FrozenDatetime(datetime):
+    """``datetime`` whose now() is 2025-01-01 20:00 UTC."""
+
+    @classmethod
+    def now(cls, tz=None):
+        moment = datetime(2025, 1, 1, 20, 0, tzinfo=timezone.utc)
+        return moment.astimezone(tz) if tz else moment.replace(tzinfo=None)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LocalDateTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch.object(tomorrow, "datetime", FrozenDatetime)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_local_now_uses_the_city_time_zone(self):
+        self.assertEqual(tomorrow.local_now("Dhaka"), datetime(2025, 1, 2, 2, 0))
+        self.assertEqual(tomorrow.local_now("New York"), datetime(2025, 1, 1, 15, 0))
+        self.assertEqual(tomorrow.local_now("Nowhere"), tomorrow.local_now("Dhaka"))
+
+    def test_today_and_cache_day_are_the_local_date(self):
+        with mock.patch.object(tomorrow, "fetch_forecast", return_value={"time": ["2025-01-02"]}), \
+                mock.patch.object(tomorrow, "fetch_air_quality", return_value={}), \
+                mock.patch.object(tomorrow, "fetch_nasa_power", return_value={}):
+            data = tomorrow.get_today_weather("Dhaka")
+        self.assertEqual(data["date"], "2025-01-02")
+        lat, lon = tomorrow.CITY_COORDS["Dhaka"]
+        for source in tomorrow.SOURCE_TIMEOUTS:
+            variant = "7d" if source == "forecast" else None
+            self.assertIsNotNone(cache.get(weather_cache.cache_key(source, lat, lon, "2025-01-02", variant)))
+            self.assertIsNone(cache.get(weather_cache.cache_key(source, lat, lon, "2025-01-01", variant)))
+
+
+class DailySeriesUpsertTests(TestCase):
+    def snapshot(self, city, day, rainfall, risk_level):
+        snapshots.store_snapshot(city, {"date": day, "rainfall_mm": rainfall, "pm25": 12.0, "risk_level": risk_level})
+
+    def test_storing_a_snapshot_twice_updates_in_place(self):
+        self.snapshot("Dhaka", "2025-07-20", 3.0, "Low")
+        self.snapshot("Dhaka", "2025-07-20", 8.5, "High")
+        self.assertEqual(WeatherObservation.objects.count(), 1)
+        self.assertEqual(RiskPrediction.objects.count(), 1)
+        observation = WeatherObservation.objects.get()
+        self.assertEqual((observation.rainfall_mm, observation.pm25), (8.5, 12.0))
+        self.assertEqual(RiskPrediction.objects.get().risk_level, "High")
+
+    def test_latest_per_location(self):
+        for day, rainfall in [("2025-07-18", 1.0), ("2025-07-20", 2.0), ("2025-07-19", 3.0)]:
+            self.snapshot("Dhaka", day, rainfall, "Low")
+        self.snapshot("Delhi", "2025-07-01", 4.0, "Low")
+        latest = WeatherObservation.objects.latest_per_location()
+        self.assertEqual(
+            sorted(latest.values_list("location", "date", "rainfall_mm")),
+            [("Delhi", date(2025, 7, 1), 4.0), ("Dhaka", date(2025, 7, 20), 2.0)],
+        )
+        self.assertFalse(RiskPrediction.objects.none().latest_per_location().exists())
+
+    def test_latest_per_location_is_one_query_for_many_locations(self):
+        WeatherObservation.objects.bulk_create(
+            WeatherObservation(location=f"City {i}", date=date(2025, 7, 1 + i % 20)) for i in range(1200)
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(len(WeatherObservation.objects.latest_per_location()), 1200)
+        latest = WeatherObservation.objects.filter(location__in=["City 0", "City 1"]).latest_per_location()
+        self.assertEqual(sorted(latest.values_list("location", "date")),
+                         [("City 0", date(2025, 7, 1)), ("City 1", date(2025, 7, 2))])
+
+    def test_predict_cities_reads_each_local_day(self):
+        cities = list(tomorrow.CITY_COORDS)
+        for city in cities:
+            self.snapshot(city, tomorrow.local_now(city).date().isoformat(), 1.0, "Low")
+        with mock.patch.object(snapshots, "get_today_weather") as live, \
+                mock.patch.object(snapshots.risk, "predict_rows",
+                                  side_effect=lambda rows: (["Low"] * len(rows), [[1.0]] * len(rows), ["Low"])):
+            results, errors, _ = snapshots.predict_cities(cities)
+        live.assert_not_called()
+        self.assertEqual((sorted(results), errors), (sorted(cities), {}))
+        for city in cities:
+            self.assertEqual(results[city]["date"], tomorrow.local_now(city).date().isoformat())
+
+    def test_batch_api_dates(self):
+        for city, local in [("Dhaka", "2025-01-02"), ("New York", "2025-01-01")]:
+            self.snapshot(city, local, 1.0, "Low")
+        predict = mock.patch.object(snapshots.risk, "predict_rows",
+                                    side_effect=lambda rows: (["Low"] * len(rows), [[1.0]] * len(rows), ["Low"]))
+        with mock.patch.object(tomorrow, "datetime", FrozenDatetime), predict:
+            both = self.client.get("/api/risk/batch/", {"cities": "Dhaka,New York"}).json()
+            one = self.client.get("/api/risk/batch/", {"cities": "Dhaka"}).json()
+        self.assertIsNone(both["date"])
+        self.assertEqual(both["results"]["New York"]["date"], "2025-01-01")
+        self.assertEqual(one["date"], "2025-01-02")
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ForecastHorizonTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def outlook(self, days):
+        urls = []
+
+        def get_json(url, params=None, timeout=None):
+            urls.append(url)
+            n = int(url.split("forecast_days=")[1].split("&")[0])
+            times = [f"2025-07-{20 + i:02d}" for i in range(n)]
+            return {"daily": {"time": times, "precipitation_sum": [1.0] * n}}
+
+        with mock.patch.object(tomorrow.upstream, "get_json", side_effect=get_json), \
+                mock.patch.object(tomorrow, "fetch_air_quality", return_value={}), \
+                mock.patch.object(tomorrow, "fetch_nasa_power", return_value={}):
+            rows, missing = tomorrow.get_weather_outlook("Dhaka", days)
+        return urls, rows
+
+    def test_horizon(self):
+        self.assertEqual([tomorrow.forecast_horizon(d) for d in (1, 7, 8, 16, 30)], [7, 7, 16, 16, 16])
+
+    def test_long_outlook_requests_and_caches_sixteen_days(self):
+        urls, rows = self.outlook(10)
+        self.assertEqual(len(rows), 10)
+        self.assertIn("forecast_days=16", urls[0])
+
+        urls, rows = self.outlook(5)
+        self.assertEqual(len(rows), 5)
+        self.assertIn("forecast_days=7", urls[0])
+
+        urls, rows = self.outlook(12)
+        self.assertEqual((urls, len(rows)), ([], 12))
+
+
+class ViewportTests(SimpleTestCase):
+    def viewport(self, bbox, zoom=5):
+        return heatmap.parse_viewport({"bbox": bbox, "zoom": zoom})
+
+    def test_in_range_bbox_is_unchanged(self):
+        self.assertEqual(self.viewport("88,20,92,26"), ((88.0, 20.0, 92.0, 26.0), 5))
+
+    def test_longitudes_are_wrapped(self):
+        self.assertEqual(self.viewport("448,20,452,26")[0], (88.0, 20.0, 92.0, 26.0))
+        self.assertEqual(self.viewport("-272,20,-268,26")[0], (88.0, 20.0, 92.0, 26.0))
+
+    def test_antimeridian_crossing(self):
+        (west, south, east, north), _ = self.viewport("170,-20,190,-10")
+        self.assertEqual((west, east), (170.0, -170.0))
+        prefixes = heatmap.cover_prefixes((west, south, east, north), 5)
+        self.assertIn(quadkey_for(-15, 179)[:len(prefixes[0])], prefixes)
+        self.assertIn(quadkey_for(-15, -179)[:len(prefixes[0])], prefixes)
+        self.assertNotIn(quadkey_for(-15, 0)[:len(prefixes[0])], prefixes)
+
+    def test_whole_world_and_latitude_clamp(self):
+        self.assertEqual(self.viewport("-400,-95,400,95", 0)[0], (-180.0, -90.0, 180.0, 90.0))
+        self.assertLessEqual(len(heatmap.cover_prefixes((-180.0, -90.0, 180.0, 90.0), 3)), heatmap.MAX_COVER_TILES)
+
+    def test_malformed_bbox_is_rejected(self):
+        for bbox in ("10,0,5,1", "0,1,1,0", "nan,0,1,1", "0,0,1"):
+            with self.assertRaises(ValueError):
+                self.viewport(bbox)
+
+
+class HeatmapViewportViewTests(TileDirMixin, TestCase):
+    def test_points_across_the_antimeridian_are_clustered(self):
+        # `longitude` holds the map latitude
+        DengueStat.objects.create(location_name="East", longitude=-15, latitude=179.5, total=5)
+        DengueStat.objects.create(location_name="West", longitude=-15, latitude=-179.5, total=10)
+        DengueStat.objects.create(location_name="Far", longitude=-15, latitude=0, total=20)
+        response = self.client.get("/api/heatmap-data/", {"bbox": "170,-20,190,-10", "zoom": 5})
+        self.assertEqual(response.status_code, 200)
+        points = response.json()["points"]
+        self.assertEqual(sorted(round(lng) for _, lng, _ in points), [-180, 180])
+
+    def test_gzip_body_has_its_own_etag(self):
+        DengueStat.objects.create(location_name="Dhaka", longitude=23.81, latitude=90.41, total=3)
+        plain = self.client.get("/api/heatmap-data/")
+        gzipped = self.client.get("/api/heatmap-data/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertNotEqual(plain["ETag"], gzipped["ETag"])
+        revalidated = self.client.get("/api/heatmap-data/", HTTP_ACCEPT_ENCODING="gzip",
+                                      HTTP_IF_NONE_MATCH=gzipped["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.client.get("/api/heatmap-data/", HTTP_IF_NONE_MATCH=gzipped["ETag"]).status_code, 200)
+
+    def test_bad_parameters_get_no_validators(self):
+        for params in ({"bbox": "1,2,3"}, {"format": "xml"}, {"since": "yesterday"}):
+            response = self.client.get("/api/heatmap-data/", params)
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.has_header("ETag"))
+            self.assertFalse(response.has_header("Last-Modified"))
+
+
+class QuadkeyBackfillMigrationTests(TileDirMixin, MigrationTestCase):
+    migrate_from = "0002_weather_observation_risk_prediction"
+    migrate_to = "0003_denguestat_quadkey"
+
+    def test_existing_rows_get_their_quadkey(self):
+        OldDengueStat = self.old_apps.get_model("planner", "DengueStat")
+        row = OldDengueStat.objects.create(location_name="Dhaka", longitude=23.81, latitude=90.41, total=3)
+        apps = self.migrate()
+        quadkey = apps.get_model("planner", "DengueStat").objects.get(pk=row.pk).quadkey
+        self.assertEqual(quadkey, quadkey_for(23.81, 90.41))
+
+
+class HeatTileTests(TileDirMixin, TestCase):
+    def test_tiles_near_matches_the_per_point_margin(self):
+        rng = np.random.default_rng(0)
+        lat, lng = rng.uniform(-80, 80, 200), rng.uniform(-180, 180, 200)
+        lat[:2], lng[:2] = 0.0, [-180.0, 179.9999]   # world edges
+        for z in (0, 3, 9):
+            n, expected = 1 << z, set()
+            for la, ln in zip(lat, lng):
+                px, py = heat_tiles.project(np.array([la]), np.array([ln]), z)
+                for dx in (-heat_tiles.MARGIN_PX, heat_tiles.MARGIN_PX):
+                    for dy in (-heat_tiles.MARGIN_PX, heat_tiles.MARGIN_PX):
+                        tx, ty = int((px[0] + dx) // 256), int((py[0] + dy) // 256)
+                        if 0 <= tx < n and 0 <= ty < n:
+                            expected.add((tx, ty))
+            self.assertEqual({tuple(t) for t in heat_tiles.tiles_near(lat, lng, z).tolist()}, expected)
+        self.assertEqual(heat_tiles.tiles_near([], [], 4).shape, (0, 2))
+
+    def test_tile_view_renders_missing_tiles_and_serves_bytes(self):
+        DengueStat.objects.create(location_name="Dhaka", longitude=23.81, latitude=90.41, total=500)
+        x, y = heat_tiles.tiles_near([23.81], [90.41], 6)[0].tolist()
+        response = self.client.get(f"/tiles/heatmap/6/{x}/{y}.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        self.assertEqual(heat_tiles.tile_path(6, x, y).read_bytes(), response.content)
+
+        heat_tiles.tile_path(6, x, y).unlink()   # invalidated after the existence check
+        self.assertEqual(heat_tiles.get_tile(6, x, y), response.content)
+
+
+class InvalidationOnCommitTests(TileDirMixin, TestCase):
+    def test_caches_are_invalidated_only_once_the_save_commits(self):
+        stat = DengueStat.objects.create(location_name="Dhaka", longitude=23.81, latitude=90.41, total=5)
+        before = dengue_cache.data_version()
+        tile = heat_tiles.tiles_near([23.81], [90.41], 6)[0]
+        heat_tiles.get_tile(6, *tile)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            stat.total = 50
+            stat.save()
+        self.assertEqual(dengue_cache.data_version(), before)
+        self.assertTrue(heat_tiles.tile_path(6, *tile).exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(dengue_cache.data_version(), before)
+        self.assertFalse(heat_tiles.tile_path(6, *tile).exists())
+
+    def test_a_render_overtaken_by_an_invalidation_is_not_cached(self):
+        DengueStat.objects.create(location_name="Dhaka", longitude=23.81, latitude=90.41, total=5)
+        render = heat_tiles.render_tile
+
+        def render_then_invalidate(z, x, y):
+            data = render(z, x, y)
+            dengue_cache.bump_data_version()
+            return data
+
+        tile = heat_tiles.tiles_near([23.81], [90.41], 6)[0]
+        with mock.patch.object(heat_tiles, "render_tile", render_then_invalidate):
+            self.assertTrue(heat_tiles.get_tile(6, *tile))
+        self.assertFalse(heat_tiles.tile_path(6, *tile).exists())
+        self.assertEqual(list(heat_tiles.tile_path(6, *tile).parent.glob("*.tmp")), [])
+
+
+class ChangesSinceTests(TileDirMixin, TestCase):
+    def create(self, name, total):
+        return DengueStat.objects.create(location_name=name, longitude=23.8, latitude=90.4, total=total)
+
+    def test_pages_through_changes_with_the_cursor(self):
+        rows = [self.create(f"L{i}", i + 1) for i in range(5)]
+        first = heatmap.changes_since(heatmap.parse_since("1970-01-01T00:00:00Z"), limit=3)
+        self.assertEqual(first["ids"], [r.pk for r in rows[:3]])
+        self.assertTrue(first["has_more"])
+
+        second = heatmap.changes_since(heatmap.parse_since(first["cursor"]), limit=3)
+        self.assertEqual(second["ids"], [r.pk for r in rows[3:]])
+        self.assertFalse(second["has_more"])
+
+        rows[1].total = 50
+        with self.captureOnCommitCallbacks(execute=True):
+            rows[1].save()
+        third = heatmap.changes_since(heatmap.parse_since(second["cursor"]))
+        self.assertEqual(third["ids"], [rows[1].pk])
+        self.assertEqual(third["points"], [[23.8, 90.4, 1.0]])
+
+        empty = heatmap.changes_since(heatmap.parse_since(third["cursor"]))
+        self.assertEqual((empty["ids"], empty["cursor"]), ([], third["cursor"]))
+
+    def test_rows_sharing_a_timestamp_are_not_skipped(self):
+        rows = [self.create(f"L{i}", 1) for i in range(3)]
+        DengueStat.objects.update(updated_at=rows[0].updated_at)
+        first = heatmap.changes_since(heatmap.parse_since("1970-01-01T00:00:00Z"), limit=2)
+        rest = heatmap.changes_since(heatmap.parse_since(first["cursor"]), limit=2)
+        self.assertEqual(first["ids"] + rest["ids"], [r.pk for r in rows])
+
+    def test_parse_since(self):
+        moment, pk = heatmap.parse_since("2025-07-20T10:00:00 06:00")   # unencoded '+'
+        self.assertEqual((moment.utcoffset().total_seconds(), pk), (6 * 3600, 0))
+        self.assertEqual(heatmap.parse_since(heatmap.encode_cursor(moment, 7)), (moment, 7))
+        with self.assertRaises(ValueError):
+            heatmap.parse_since("yesterday")
+
+
+class ChangeCursorMigrationTests(TileDirMixin, MigrationTestCase):
+    migrate_from = "0003_denguestat_quadkey"
+    migrate_to = "0004_denguestat_change_cursor"
+
+    def test_existing_rows_start_at_their_creation_time(self):
+        OldDengueStat = self.old_apps.get_model("planner", "DengueStat")
+        row = OldDengueStat.objects.create(location_name="Dhaka", longitude=23.81, latitude=90.41, total=3)
+        apps = self.migrate()
+        migrated = apps.get_model("planner", "DengueStat").objects.get(pk=row.pk)
+        self.assertEqual(migrated.updated_at, migrated.created_at)
+
+
+class ImportDengueStatsTests(TileDirMixin, TestCase):
+    def write_csv(self, name, rows):
+        path = self.tmp / name
+        lines = ["location_name,longitude,latitude,total,dead"] + [",".join(map(str, r)) for r in rows]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return str(path)
+
+    def import_csv(self, path, *args):
+        call_command("import_dengue_stats", path, *args, stdout=io.StringIO())
+
+    def snapshot(self):
+        return sorted(DengueStat.objects.values_list("location_name", "total", "dead"))
+
+    def test_upsert_is_idempotent(self):
+        path = self.write_csv("a.csv", [("Dhaka", 23.8, 90.4, 10, 1), ("Khulna", 22.8, 89.5, 4, 0)])
+        self.import_csv(path)
+        self.import_csv(path)
+        self.assertEqual(self.snapshot(), [("Dhaka", 10, 1), ("Khulna", 4, 0)])
+
+        self.import_csv(self.write_csv("b.csv", [("Dhaka", 23.8, 90.4, 12, 2), ("Dhaka", 23.8, 90.4, 15, 2)]))
+        self.assertEqual(self.snapshot(), [("Dhaka", 15, 2), ("Khulna", 4, 0)])
+
+    def test_insert_keeps_every_row(self):
+        path = self.write_csv("a.csv", [("Dhaka", 23.8, 90.4, 10, 1), ("Dhaka", 23.8, 90.4, 12, 2)])
+        self.import_csv(path, "--mode", "insert")
+        self.assertEqual(self.snapshot(), [("Dhaka", 10, 1), ("Dhaka", 12, 2)])
+        self.import_csv(path, "--mode", "insert")
+        self.assertEqual(DengueStat.objects.count(), 4)
+        self.assertTrue(all(DengueStat.objects.values_list("quadkey", flat=True)))
+
+
+class CaseWindowTests(TestCase):
+    def test_incremental_updates_match_a_rebuild(self):
+        rng = np.random.default_rng(1)
+        start = date(2024, 12, 1)
+        for batch in range(12):
+            # mostly new days, plus corrections to days already recorded (some outside every window)
+            days = [start + timedelta(days=int(d)) for d in rng.integers(0, 6 * (batch + 1), 8)]
+            case_windows.record_daily_cases([
+                DailyCaseCount(location=str(rng.choice(["Dhaka", "Khulna"])), date=day,
+                               total=int(rng.integers(0, 50)), dead=int(rng.integers(0, 3)))
+                for day in days
+            ])
+            as_of = max(DailyCaseCount.objects.values_list("date", flat=True))
+            expected = {
+                (window, location): sums
+                for window, first in case_windows.WINDOWS.items()
+                for location, sums in case_windows._sums(first(as_of), as_of).items()
+                if any(sums)
+            }
+            incremental = {
+                (s.window, s.location): (s.total, s.dead)
+                for s in CaseWindowSummary.objects.all() if s.total or s.dead
+            }
+            self.assertEqual(incremental, expected)
+            self.assertEqual(set(CaseWindowSummary.objects.values_list("as_of", flat=True)), {as_of})
+
+    def test_admin_is_read_only(self):
+        request = RequestFactory().get("/admin/")
+        for model in (DailyCaseCount, CaseWindowSummary):
+            model_admin = admin.site._registry[model]
+            self.assertFalse(model_admin.has_add_permission(request))
+            self.assertFalse(model_admin.has_change_permission(request))
+            self.assertFalse(model_admin.has_delete_permission(request))
+
+
+class HourlyAggregationEquivalenceTests(SimpleTestCase):
+    def assertSameAsLegacy(self, times, pm25, pm10, **kwargs):
+        expected = benchmark.legacy_aggregate_hourly_to_daily(times, pm25, pm10, **kwargs)
+        actual = history.aggregate_hourly_to_daily(times, pm25, pm10, **kwargs)
+        self.assertEqual(list(map(dict, actual)), list(map(dict, expected)))
+
+    def test_synthetic_years(self):
+        for seed, missing in [(0, 0.1), (1, 0.6), (2, 0.0)]:
+            self.assertSameAsLegacy(*benchmark.synthetic_hourly(60, seed, missing))
+
+    def test_unordered_hours_and_odd_values(self):
+        times, pm25, pm10 = benchmark.synthetic_hourly(5, 3)
+        order = np.random.default_rng(3).permutation(len(times))
+        times, pm25, pm10 = ([values[i] for i in order] for values in (times, pm25, pm10))
+        times[:3] = ["", None, times[3]]
+        pm25[4:7] = ["12.5", "n/a", 7]
+        self.assertSameAsLegacy(times, pm25, pm10)
+        self.assertSameAsLegacy(times, pm25, pm10, min_hours=1)
+
+    def test_empty(self):
+        self.assertSameAsLegacy([], [], [])
+
+
+class AqiEquivalenceTests(SimpleTestCase):
+    def assertSameAsLegacy(self, pm25, pm10):
+        keys = list(range(len(pm25)))
+        expected = benchmark.legacy_compute_daily_aqi(dict(zip(keys, pm25)), dict(zip(keys, pm10)))
+        result = aqi.daily_aqi(pm25, pm10)
+        actual = dict(zip(keys, zip(aqi.as_ints(result["aqi"]), result["category"], result["dominant"])))
+        self.assertEqual(actual, expected)
+
+    def test_random_concentrations(self):
+        rng = np.random.default_rng(0)
+        pm25 = [None if m else round(v, 1) for v, m in zip(rng.uniform(0, 600, 5000), rng.random(5000) < 0.05)]
+        pm10 = [None if m else round(v, 1) for v, m in zip(rng.uniform(0, 700, 5000), rng.random(5000) < 0.05)]
+        self.assertSameAsLegacy(pm25, pm10)
+
+    def test_breakpoint_edges_gaps_and_ties(self):
+        edges25 = sorted({v for lo, hi, _, _ in benchmark.LEGACY_PM25_BREAKPOINTS for v in (lo, hi)})
+        edges10 = sorted({v for lo, hi, _, _ in benchmark.LEGACY_PM10_BREAKPOINTS for v in (lo, hi)})
+        pm25 = [*edges25, 12.05, 35.45, 500.5, 1000.0, 0.0, None, None, 12.0]
+        pm10 = [*edges10, 54.5, 154.5, 604.5, 2000.0, 0.0, 20.0, None, 54.0]
+        n = min(len(pm25), len(pm10))
+        self.assertSameAsLegacy(pm25[:n], pm10[:n])
+        self.assertSameAsLegacy(pm25[-8:], pm10[-8:])
+        self.assertSameAsLegacy(edges25, [None] * len(edges25))
+        self.assertSameAsLegacy([None] * len(edges10), edges10)
+
+    def test_categories(self):
+        values = [None, 0, 50, 50.5, 51, 100, 101, 150, 151, 200, 201, 300, 301, 500, 750]
+        self.assertEqual(list(aqi.category(values)), [benchmark.legacy_aqi_category(v) for v in values])
+
+
+class RiskScoringEquivalenceTests(TempDirMixin, SimpleTestCase):
+    def legacy_labels(self, df):
+        df = df.copy()
+        df[risk_scoring.NUMERIC_COLUMNS] = df[risk_scoring.NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce")
+        return list(df.apply(benchmark.legacy_calculate_risk, axis=1))
+
+    def test_synthetic_rows(self):
+        df = benchmark.synthetic_weather(20000, seed=4)
+        self.assertEqual(list(risk_scoring.risk_labels(df)), self.legacy_labels(df))
+
+    def test_rule_boundaries_and_unparseable_values(self):
+        edges = {
+            "temp_mean_C": [19.9, 20, 26, 30, 33, 40],
+            "rainfall_mm": [0.9, 1, 60, 100, 200, 250],
+            "humidity_percent": [59.9, 60, 80, 100, "n/a", None],
+            "pm25": [14.9, 15, 50, 120, 0, None],
+            "pm10": [29.9, 30, 100, 200, 0, ""],
+            "wind_speed_kph": [5, 5.1, 20, 35, 0, None],
+            "uv_index": [3, 3.1, 9, 12, 0, None],
+        }
+        grid = pd.MultiIndex.from_product(list(edges.values()), names=list(edges)).to_frame(index=False)
+        grid = grid.sample(20000, random_state=0)
+        self.assertEqual(list(risk_scoring.risk_labels(grid)), self.legacy_labels(grid))
+
+    def score_risk(self, *args):
+        call_command("score_risk", *args, stdout=io.StringIO())
+
+    def test_score_risk_reports_bad_input(self):
+        with self.assertRaisesMessage(CommandError, "Cannot read"):
+            self.score_risk(str(self.tmp / "missing.csv"), "--output", str(self.tmp / "out.csv"))
+        empty = self.tmp / "empty.csv"
+        empty.write_text("")
+        with self.assertRaisesMessage(CommandError, "Cannot read"):
+            self.score_risk(str(empty), "--output", str(self.tmp / "out.csv"))
+        partial = self.tmp / "partial.csv"
+        partial.write_text("location,date,pm25\nDhaka,2025-07-20,12\n")
+        with self.assertRaisesMessage(CommandError, "missing column"):
+            self.score_risk(str(partial), "--output", str(self.tmp / "out.csv"))
+
+    def test_score_risk_labels_a_csv(self):
+        source = self.tmp / "in.csv"
+        benchmark.synthetic_weather(50).assign(location="Dhaka", date="2025-07-20").to_csv(source, index=False)
+        self.score_risk(str(source), "--output", str(self.tmp / "out.csv"))
+        out = pd.read_csv(self.tmp / "out.csv")
+        self.assertEqual(list(out["risk"]), self.legacy_labels(pd.read_csv(source)))
+
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+
+class DatasetTests(TempDirMixin, SimpleTestCase):
+    def frame(self):
+        rows = [
+            {"location": location, "date": f"{year}-07-{day:02d}", "rainfall_mm": 0.1 * day, "aqi_category": "Good"}
+            for location in ("Delhi", "Mumbai") for year in (2024, 2025) for day in (1, 2, 3)
+        ]
+        return pd.DataFrame(rows)
+
+    def test_csv_round_trip_and_upsert(self):
+        path = self.tmp / "weather.csv"
+        df = self.frame()
+        datasets.save(df, path)
+        pd.testing.assert_frame_equal(datasets.load(path), df)
+        self.assertEqual(len(datasets.load(path, locations=["Mumbai"], years=[2025])), 3)
+
+        total = datasets.upsert(path, [
+            {"location": "Delhi", "date": "2025-07-02", "rainfall_mm": 9.0, "aqi_category": "Moderate"},
+            {"location": "Delhi", "date": "2025-07-04", "rainfall_mm": 1.0, "aqi_category": "Good"},
+        ])
+        loaded = datasets.load(path)
+        self.assertEqual(total, 13)
+        self.assertEqual(list(loaded["location"]), ["Delhi"] * 7 + ["Mumbai"] * 6)
+        self.assertEqual(list(loaded["date"][:7]), sorted(loaded["date"][:7]))
+        self.assertEqual(loaded.set_index(["location", "date"]).loc[("Delhi", "2025-07-02"), "rainfall_mm"], 9.0)
+        self.assertEqual(datasets.upsert(path, loaded.tail(2)), 13)
+
+    def test_csv_filters_read_their_columns(self):
+        path = self.tmp / "weather.csv"
+        datasets.save(self.frame(), path)
+        loaded = datasets.load(path, columns=["rainfall_mm"], locations=["Mumbai"], years=[2025])
+        self.assertEqual(list(loaded.columns), ["rainfall_mm"])
+        self.assertEqual(len(loaded), 3)
+
+        datasets.save(self.frame().drop(columns=["location", "date"]), path)
+        with self.assertRaisesMessage(ValueError, "missing the column(s) to filter on: location, date"):
+            datasets.load(path, locations=["Mumbai"], years=[2025])
+        with self.assertRaisesMessage(CommandError, "missing the column(s) to filter on: location"):
+            call_command("convert_dataset", str(path), str(self.tmp / "out.csv"), locations="Mumbai",
+                         stdout=io.StringIO())
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet_round_trip_and_upsert(self):
+        path = self.tmp / "weather"
+        df = self.frame()
+        datasets.save(df, path)
+        loaded = datasets.load(path)
+        self.assertEqual(list(loaded.columns), list(df.columns))
+        pd.testing.assert_frame_equal(datasets._plain(loaded), df, check_dtype=False, atol=1e-6)
+        self.assertEqual(len(datasets.load(path, locations=["Mumbai"], years=[2025])), 3)
+
+        self.assertEqual(datasets.upsert(path, [
+            {"location": "Mumbai", "date": "2025-07-01", "rainfall_mm": 5.0, "aqi_category": "Good"},
+        ]), 3)
+        self.assertEqual(len(datasets.load(path)), 12)
+
+
+def write_training_csv(path, last_day):
+    """The repo's labelled dataset from 2023 up to ``last_day``, written to ``path``."""
+    df = pd.read_csv(Path(settings.BASE_DIR) / "planner" / "data" / "prediction_dataset_with_risk.csv")
+    df[(df["date"] >= "2023-01-01") & (df["date"] <= last_day)].to_csv(path, index=False)
+    return path
+
+
+class TrainingDataMixin(TempDirMixin):
+    def training_csv(self, last_day, name="train.csv"):
+        return write_training_csv(self.tmp / name, last_day)
+
+
+class TrainRiskModelTests(TrainingDataMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artifacts = self.tmp / "artifacts"
+        self.model_path = self.tmp / "served" / "svm_weather_model.pkl"
+        self.model_path.parent.mkdir()
+        override = override_settings(RISK_MODEL_PATH=self.model_path, RISK_MODEL_VERSION=None)
+        override.enable()
+        self.addCleanup(override.disable)
+        model_registry._current = (None, None)
+        self.addCleanup(setattr, model_registry, "_current", (None, None))
+
+    def train(self, *args):
+        out = io.StringIO()
+        call_command(
+            "train_risk_model", str(self.training_csv("2023-06-30")), "--n-iter", "2", "--cv", "2",
+            "--n-jobs", "1", "--cache-dir", str(self.tmp / "cache"), "--artifacts-dir", str(self.artifacts),
+            *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def test_full_search_writes_a_versioned_artifact_and_promotes_it(self):
+        output = self.train("--artifact-version", "v1", "--promote")
+        self.assertIn("promoted", output)
+
+        metadata = training.load_metadata(self.artifacts / "v1")
+        self.assertEqual(metadata["version"], "v1")
+        self.assertEqual(metadata["mode"], "full")
+        self.assertEqual(set(metadata["best_params"]), {"C", "gamma"})
+        self.assertEqual(metadata["data"]["rows"], 2 * 181)
+        self.assertEqual(metadata["data"]["last_dates"], {"Delhi": "2023-06-30", "Mumbai": "2023-06-30"})
+        self.assertEqual(metadata["search"], {"n_iter": 2, "cv": 2, "random_state": 42, "n_jobs": 1})
+        self.assertGreater(metadata["metrics"]["accuracy"], 0.5)
+
+        self.assertEqual(json.loads(training.sidecar_path(self.model_path).read_text())["version"], "v1")
+        self.assertEqual(self.model_path.read_bytes(), (self.artifacts / "v1" / training.MODEL_FILE).read_bytes())
+        with self.assertLogs("planner.services.model_registry", "INFO") as logs:
+            model = model_registry.get_model()
+        self.assertIn("version v1", logs.output[0])
+        rows = training.load_training_data(self.training_csv("2023-01-03", "few.csv"))[training.FEATURE_COLUMNS]
+        self.assertLessEqual(set(model.predict(rows)), set(metadata["classes"]))
+
+    def test_latest_artifact(self):
+        self.assertIsNone(training.latest_artifact(self.artifacts))
+        self.train("--artifact-version", "b")
+        self.train("--artifact-version", "a", "--no-cache")
+        self.assertEqual(training.latest_artifact(self.artifacts).name, "a")
+        self.assertFalse(self.model_path.exists())
+
+
+class IncrementalRetrainTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = Path(tempfile.mkdtemp())
+        cls.addClassCleanup(shutil.rmtree, cls.tmp, ignore_errors=True)
+        cls.options = dict(n_jobs=1, n_iter=2, cv=2)
+        model, metadata = training.train(cls.load("2024-06-30"), **cls.options)
+        cls.base = training.save_artifact(model, metadata, "base", cls.tmp / "artifacts")
+
+    @classmethod
+    def load(cls, last_day):
+        return training.load_training_data(write_training_csv(cls.tmp / f"{last_day}.csv", last_day))
+
+    def retrain(self, df, **kwargs):
+        return training.retrain(df, self.base, **self.options, **kwargs)
+
+    def test_drift_limit_narrows_with_batch_size(self):
+        self.assertEqual(training.drift_limit(1.5, 1), 4.5)
+        self.assertAlmostEqual(training.drift_limit(1.5, 100), 1.8)
+        self.assertEqual(training.drift_limit(1.5, 0), float("inf"))
+
+    def test_ordinary_days_warm_start(self):
+        # 2024-07-01 alone shifts rainfall ~1.6 std -- past the bare threshold, within a day's noise
+        for last_day in ("2024-07-01", "2024-07-07"):
+            model, metadata = self.retrain(self.load(last_day))
+            self.assertEqual(metadata["mode"], "incremental", metadata.get("full_search_reason"))
+            self.assertEqual(metadata["base_version"], "base")
+            self.assertGreater(metadata["drift_limit"], training.DRIFT_THRESHOLD)
+            self.assertEqual(metadata["best_params"], training.load_metadata(self.base)["best_params"])
+
+    def test_chained_retrains_keep_the_split_and_the_full_fit_scale(self):
+        previous = training.load_metadata(self.base)
+        base = self.base
+        for last_day in ("2024-07-03", "2024-07-07"):
+            df = self.load(last_day)
+            model, metadata = training.retrain(df, base, **self.options)
+            self.assertEqual(metadata["mode"], "incremental", metadata.get("full_search_reason"))
+            # the rows the previous run trained on are never held out, the ones it held out still are
+            test = training.keys_mask(df, metadata["data"]["test_keys"])
+            seen = ~training.new_rows_mask(df, previous["data"]["last_dates"])
+            held = training.keys_mask(df, previous["data"]["test_keys"])
+            self.assertFalse((test & seen & ~held).any())
+            self.assertTrue(test[held].all())
+            self.assertEqual(test.sum(), metadata["data"]["test_rows"])
+
+            self.assertEqual(metadata["full_fit_train_rows"], previous["full_fit_train_rows"])
+            self.assertAlmostEqual(
+                metadata["timings"]["full_fit_seconds_estimate"],
+                previous["full_fit_seconds"] * metadata["data"]["train_rows"] / previous["full_fit_train_rows"],
+            )
+            base = training.save_artifact(model, metadata, last_day, self.tmp / "artifacts")
+            previous = metadata
+
+    def test_fill_values_force_a_full_search(self):
+        df = self.load("2024-07-07")
+        df.loc[df["date"] > "2024-06-30", "uv_index"] = -999.0
+        model, metadata = self.retrain(df)
+        self.assertEqual(metadata["mode"], "full")
+        self.assertIn("drift in uv_index", metadata["full_search_reason"])
+
+    def test_fallback_reasons(self):
+        previous = training.load_metadata(self.base)
+        df = self.load("2024-07-03")
+        new = training.new_rows_mask(df, previous["data"]["last_dates"])
+
+        def reason(previous=previous, df=df, new=new, drift=None, limit=4.5):
+            return training.full_search_reason(previous, df, new, drift or {}, 7, limit)
+
+        self.assertIsNone(reason())
+        self.assertIn("drift in pm25", reason(drift={"pm25": 4.6, "pm10": 4.4}))
+        self.assertIn("no incremental state", reason(previous={**previous, "data": {}}))
+        stale = (datetime.now(timezone.utc) - timedelta(days=8)).isoformat()
+        self.assertIn("older than 7 days", reason(previous={**previous, "full_search_at": stale}))
+        self.assertIn("rows are new", reason(new=np.ones(len(df), dtype=bool)))
+
+        unknown = df.copy()
+        unknown.loc[new, "location"] = "Kolkata"
+        self.assertIn("new locations: Kolkata", reason(df=unknown))
+        classes = df.copy()
+        classes.loc[new, training.TARGET] = "Extreme"
+        self.assertIn("new classes: Extreme", reason(df=classes))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PartialSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = tomorrow.local_now("Dhaka").date().isoformat()
+
+    def live(self, missing=None, **values):
+        data = {"date": self.today, "location": "Dhaka", "rainfall_mm": 2.0, **values, "risk_level": "Low"}
+        if missing:
+            data["missing_sources"] = missing
+        return data
+
+    def test_partial_snapshot_is_stored_with_its_missing_sources(self):
+        snapshots.store_snapshot("Dhaka", self.live(["nasa_power"]))
+        self.assertEqual(WeatherObservation.objects.get().missing_sources, ["nasa_power"])
+        self.assertEqual(snapshots.get_snapshot("Dhaka")["missing_sources"], ["nasa_power"])
+
+    def test_partial_snapshot_is_refreshed_on_read(self):
+        snapshots.store_snapshot("Dhaka", self.live(["nasa_power"]))
+        with mock.patch.object(snapshots, "get_today_weather_and_air", return_value=self.live(humidity_percent=80.0)):
+            data = snapshots.get_weather("Dhaka")
+        self.assertNotIn("missing_sources", data)
+        self.assertEqual(WeatherObservation.objects.get().missing_sources, [])
+
+        with mock.patch.object(snapshots, "get_today_weather_and_air") as live:
+            self.assertEqual(snapshots.get_weather("Dhaka")["humidity_percent"], 80.0)
+        live.assert_not_called()
+
+    def test_partial_snapshot_is_kept_when_the_refresh_fails(self):
+        snapshots.store_snapshot("Dhaka", self.live(["nasa_power"]))
+        with mock.patch.object(snapshots, "get_today_weather_and_air", return_value={"error": "down"}):
+            data = snapshots.get_weather("Dhaka")
+        self.assertEqual((data["rainfall_mm"], data["missing_sources"]), (2.0, ["nasa_power"]))
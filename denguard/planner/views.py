@@ -8,50 +8,24 @@ from django.contrib.auth import login, authenticate
 from users.forms import SignupForm
 from users.models import UserProfile
 from django.contrib.auth import get_backends
-import pandas as pd
-import json
-from planner.services.tomorrow import get_today_weather_and_air
+from planner.services.case_windows import WINDOWS, window_summary
+from planner.services.dashboard import case_summary_context
+from planner.services.snapshots import get_weather, known_cities, predict_cities, resolve_city
+from planner.services.tomorrow import get_risk_outlook
 
 # Create your views here.
 @login_required
 def home(request):
     profile = request.user.userprofile
-    city = "Dhaka"   # or profile.city if user has city saved in profile
-    data = get_today_weather_and_air(city)
+    city = resolve_city(profile.location) or "Dhaka"
+    data = get_weather(city)   # precomputed by the prefetch_weather command
 
-    # === Load dengue CSV for charts ===
-    df = pd.read_csv("planner/data/dengue_stats.csv")
-
-    # Aggregate total/male/female/dead by location
-    agg_df = df.groupby("location_name").sum().reset_index()
-    locations = agg_df["location_name"].tolist()
-    total_cases = agg_df["total"].tolist()
-    male_cases = agg_df["male"].tolist()
-    female_cases = agg_df["female"].tolist()
-    dead_cases = agg_df["dead"].tolist()
-
-    # Gender distribution overall
-    gender_distribution = [sum(male_cases), sum(female_cases)]
-
-    # Bubble/Scatter chart data
-    latitudes = agg_df["latitude"].tolist()
-    longitudes = agg_df["longitude"].tolist()
-    bubble_sizes = [x / 10 for x in total_cases]  # scale down for visibility
-
-    # Pass everything as JSON for Chart.js
+    # Chart aggregates: computed in the DB, cached until DengueStat changes
     context = {
         'profile': profile,
         'data': data,
         'city': city,
-        'locations_json': json.dumps(locations),
-        'total_cases_json': json.dumps(total_cases),
-        'male_cases_json': json.dumps(male_cases),
-        'female_cases_json': json.dumps(female_cases),
-        'dead_cases_json': json.dumps(dead_cases),
-        'gender_distribution_json': json.dumps(gender_distribution),
-        'latitudes_json': json.dumps(latitudes),
-        'longitudes_json': json.dumps(longitudes),
-        'bubble_sizes_json': json.dumps(bubble_sizes),
+        **case_summary_context(),
     }
 
     return render(request, 'home.html', context)
@@ -105,35 +79,126 @@ def signup_view(request):
 
 
 # planner/views.py
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
-from django.db.models import Max
-from .models import DengueStat
+from django.views.decorators.http import condition
+from .services import heat_tiles, heatmap
 
 def heatmap_view(request):
     # No need to filter by year, just render the template
     return render(request, "heatmap.html")
 
 def heatmap_data_api(request):
-    qs = DengueStat.objects.all()  # Get all records
+    # Projected (lon, lat, total) query, encoded once per data version;
+    # unchanged data is answered with 304 by the condition decorator.
+    # With ?bbox=west,south,east,north&zoom=z only the visible area is
+    # returned, clustered into grid cells suited to the zoom level.
+    # ?format=f32|q16 returns columnar typed arrays instead of JSON.
+    # ?since=<cursor|timestamp> returns only rows added/changed after it (JSON).
+    # Parameters are validated first so 400s carry no ETag/Last-Modified.
+    if request.GET.get("since"):
+        try:
+            since = heatmap.parse_since(request.GET["since"])
+            limit = min(int(request.GET.get("limit", heatmap.CHANGES_LIMIT)), heatmap.MAX_CHANGES_LIMIT)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return _heatmap_changes(request, since, max(limit, 1))
+
+    fmt = request.GET.get("format", "json")
+    if fmt not in heatmap.FORMATS:
+        return JsonResponse({"error": f"format must be one of {', '.join(heatmap.FORMATS)}"}, status=400)
+    try:
+        viewport = heatmap.parse_viewport(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return _heatmap_payload(request, fmt, viewport)
+
+@condition(etag_func=heatmap.etag, last_modified_func=heatmap.last_modified)
+def _heatmap_changes(request, since, limit):
+    return JsonResponse(heatmap.changes_since(since, limit))
+
+@condition(etag_func=heatmap.encoded_etag, last_modified_func=heatmap.last_modified)
+def _heatmap_payload(request, fmt, viewport):
+    if viewport is None:
+        payload = heatmap.points_payload(fmt)
+    else:
+        payload = heatmap.cells_payload(*viewport, fmt)
+    return heatmap.encoded_response(request, payload)
 
-    max_total = qs.aggregate(m=Max("total"))["m"] or 1
-    points = []
-    for r in qs:
-        if r.latitude is None or r.longitude is None:
-            continue
-        intensity = round(r.total / max_total, 3)  # normalize 0..1
-        points.append([r.longitude, r.latitude, intensity])
 
-    return JsonResponse({"points": points, "max_total": max_total})
 
+def heatmap_tile(request, z, x, y):
+    """Kernel-density raster tile, rendered on first request and then served from disk."""
+    if not heat_tiles.is_valid_tile(z, x, y):
+        raise Http404("No such tile")
+    response = HttpResponse(heat_tiles.get_tile(z, x, y), content_type="image/png")
+    response["Cache-Control"] = "public, max-age=300"
+    return response
 
 
-from django.views.decorators.cache import cache_page
-from .services.tomorrow import get_today_weather_and_air
 
-@cache_page(60 * 15)  # cache for 15 minutes to save API calls
+# Reads the snapshot precomputed by the prefetch_weather command (persisted as
+# WeatherObservation/RiskPrediction rows); upstream payloads are additionally
+# cached per source in services.weather_cache.
 def weather_today(request):
     city = request.GET.get("city", "Dhaka")
-    data = get_today_weather_and_air(city)
+    data = get_weather(resolve_city(city) or city)
     return render(request, "weather_today.html", {"data": data, "city": city})
+
+
+def risk_batch_api(request):
+    """
+    /api/risk/batch/?cities=Dhaka,Delhi  (or cities=all / no parameter for every known city)
+    One vectorized prediction for all requested cities, each for its local
+    date ("date" at the top only when they all share one).
+    """
+    param = request.GET.get("cities", "all").strip()
+    unknown = []
+    if param.lower() == "all":
+        cities = known_cities()
+    else:
+        cities = []
+        for name in filter(None, (c.strip() for c in param.split(","))):
+            city = resolve_city(name)
+            if city is None:
+                unknown.append(name)
+            elif city not in cities:
+                cities.append(city)
+
+    results, errors, classes = predict_cities(cities)
+    dates = {result["date"] for result in results.values()}
+    return JsonResponse({
+        # cities are predicted for their own local today; see each result's date
+        "date": dates.pop() if len(dates) == 1 else None,
+        "classes": classes,
+        "results": results,
+        "errors": errors,
+        "unknown": unknown,
+    })
+
+
+def risk_forecast_api(request):
+    """/api/risk/forecast/?city=Dhaka&days=7 -- multi-day risk outlook from one forecast payload."""
+    city = resolve_city(request.GET.get("city", "Dhaka"))
+    if city is None:
+        return JsonResponse({"error": "unknown city"}, status=404)
+    try:
+        days = max(1, min(int(request.GET.get("days", 7)), 16))
+    except ValueError:
+        days = 7
+
+    outlook = get_risk_outlook(city, days)
+    return JsonResponse(outlook, status=502 if "error" in outlook else 200)
+
+
+def case_windows_api(request):
+    """/api/cases/summary/?window=7d|30d|season -- cases per location over a rolling window."""
+    window = request.GET.get("window", "7d")
+    if window not in WINDOWS:
+        return JsonResponse({"error": f"window must be one of {', '.join(WINDOWS)}"}, status=400)
+    as_of, rows = window_summary(window)
+    return JsonResponse({
+        "window": window,
+        "as_of": as_of.isoformat() if as_of else None,
+        "locations": rows,
+    })